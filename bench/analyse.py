@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Compare the speed of comparetext.analyse with the former implementation
+
+Usage: bench/analyse.py feedfile [runs]
+
+Analyses the texts of all items of the feed and prints the best time of
+several runs for both implementations.
+"""
+import math
+import os
+import re
+import sys
+import timeit
+from collections import Counter
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+)
+
+import comparetext  # noqa: E402
+from feed import get_feed  # noqa: E402
+
+re_filters = [re.compile(i) for i in (r"\d+$", r"\w$", r"[A-Z][a-z]{1,2}$")]
+
+
+def analyse_old(lang, *txt):
+    """
+    The former implementation, with the filters in a list instead of an
+    exhausted generator, so that it does the same work
+    """
+    txt = " ".join(txt)
+    txt = comparetext.specialchar_filter.sub("", txt)
+
+    wordlist = Counter(txt.split())
+
+    for word in list(wordlist):
+        for re_filter in re_filters:
+            if re_filter.match(word):
+                del wordlist[word]
+                break
+
+    wordlist = dict((k.lower(), v) for k, v in wordlist.items())
+
+    for word in comparetext.common_words(lang) or ():
+        try:
+            del wordlist[word]
+        except KeyError:
+            continue
+
+    norm = math.sqrt(sum(value * value * len(key) for key, value in wordlist.items()))
+
+    return (wordlist, norm)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("no feed given")
+        sys.exit(-1)
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with open(sys.argv[1], "rb") as infile:
+        feed = get_feed(infile)
+    lang = feed.lang.split("-")[0]
+    texts = [
+        (item.title, item.description.text, item.content.text) for item in feed
+    ]
+
+    for name, function in (("old", analyse_old), ("new", comparetext.analyse)):
+        best = min(
+            timeit.repeat(
+                lambda: [function(lang, *text) for text in texts], number=1, repeat=runs
+            )
+        )
+        print(
+            "%s: %8.2f ms for %i items (%.1f µs per item)"
+            % (name, best * 1000, len(texts), best / len(texts) * 1e6)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measure the startup time of feedfilter
+
+Usage: bench/startup.py [module [runs]]
+
+Imports the module (default: main) in a fresh interpreter several times and
+prints the median wall time, followed by the slowest imports as reported by
+python -X importtime.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+srcdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+
+
+def import_time(module):
+    """
+    Return the wall time in seconds of importing the module in a new process
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import " + module], cwd=srcdir, check=True)
+    return time.perf_counter() - start
+
+
+def slowest_imports(module, count=15):
+    """
+    Return the cumulative import times (in microseconds) of the slowest
+    modules loaded when importing the module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=srcdir,
+        check=True,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times.append((int(cumulative), name.rstrip()))
+    return sorted(times, reverse=True)[:count]
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else "main"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    baseline = statistics.median(import_time("sys") for _ in range(runs))
+    total = statistics.median(import_time(module) for _ in range(runs))
+    print("interpreter startup: %6.1f ms" % (baseline * 1000))
+    print("import %s: %6.1f ms" % (module, (total - baseline) * 1000))
+    print()
+    print("slowest imports (cumulative ms):")
+    for cumulative, name in slowest_imports(module):
+        print("%8.1f %s" % (cumulative / 1000, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+#!/bin/sh
+
+cd $(dirname $0)
+python3 src/batch.py $*
@@ -0,0 +1,128 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+from concurrent.futures import ProcessPoolExecutor
+
+import comparetext
+from feed.content import HTMLContent, TextExtractor
+
+# Number of items sent to a worker at once
+CHUNK_SIZE = 64
+
+# Increased whenever score changes, so that stored filter levels are
+# recalculated
+VERSION = 2
+
+# The language, filter, title_scale and score limit used by a worker process
+_worker = None
+
+
+def score(wordfilter, title_scale, title, categories, text, limit=None):
+    """
+    Calculate the filter level of an item from its texts
+
+    text: the content of the item, or its description if it has no content
+
+    limit: stop as soon as the level is sure to exceed this value and return a
+    lower bound of the level, see Filter.check
+    """
+    parts = [(title, title_scale)]
+    if categories:
+        parts.append((categories, 1))
+    parts.append((text, 1))
+    lvl = 0
+    for index, (part, multiplier) in enumerate(parts):
+        if limit is None:
+            lvl += wordfilter.check(part, multiplier)
+            continue
+        # the remaining texts can still lower the level by this much
+        remaining = sum(
+            multiplier * wordfilter.negative_weight()
+            for _, multiplier in parts[index + 1 :]
+        )
+        lvl += wordfilter.check(part, multiplier, limit - lvl - remaining)
+        if lvl + remaining > limit:
+            return lvl + remaining
+    return lvl
+
+
+def _content_payload(content):
+    if isinstance(content, HTMLContent):
+        return (True, str(content))
+    return (False, content.text)
+
+
+def _content_text(payload):
+    is_html, text = payload
+    if is_html:
+        return TextExtractor.extract(text)
+    return text
+
+
+def payload(child):
+    """
+    The texts of an item needed to analyse and score it, as plain strings
+    """
+    return (
+        child.title,
+        child.categories or "",
+        _content_payload(child.description),
+        _content_payload(child.content),
+    )
+
+
+def _init_worker(lang, wordfilter, title_scale, limit):
+    global _worker
+    _worker = (lang, wordfilter, title_scale, limit)
+
+
+def _process_chunk(payloads):
+    lang, wordfilter, title_scale, limit = _worker
+    results = []
+    for title, categories, description, content in payloads:
+        description = _content_text(description)
+        content = _content_text(content)
+        text = content or description
+        lvl = score(wordfilter, title_scale, title, categories, text, limit)
+        if limit is not None and lvl > limit:
+            results.append((None, lvl))
+            continue
+        wordlist = comparetext.analyse(lang, title, description, content)
+        results.append((wordlist, lvl))
+    return results
+
+
+def analyse_items(items, lang, wordfilter, title_scale, workers, limit=None):
+    """
+    Analyse and score items in a pool of worker processes
+
+    Returns the wordlist and filter level of every item, in the order of the
+    items. workers: the number of processes, 0 for one per cpu
+    limit: if given, items whose filter level exceeds it are not analysed and
+    their wordlist is None
+    """
+    chunks = [
+        [payload(child) for child in items[start : start + CHUNK_SIZE]]
+        for start in range(0, len(items), CHUNK_SIZE)
+    ]
+    with ProcessPoolExecutor(
+        workers or None,
+        initializer=_init_worker,
+        initargs=(lang, wordfilter, title_scale, limit),
+    ) as pool:
+        results = pool.map(_process_chunk, chunks)
+        return [result for chunk in results for result in chunk]
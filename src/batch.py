@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import gettext
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import logger
+from fetch import fetch
+from main import process
+from settings import Settings
+from utils import replace_on_success
+
+
+def download(section):
+    """
+    Fetch the feed of a section into a temporary file and return its name
+    (runs in the I/O pool)
+    """
+    settings = Settings()
+    settings.read_source(section)
+    if settings.outputfile is None:
+        raise ValueError("Config does not specify an outputfile")
+    with fetch(settings.url, settings.cachedir, settings.timeout) as infile:
+        with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as outfile:
+            shutil.copyfileobj(infile, outfile)
+    return outfile.name
+
+
+def run(section, filename):
+    """
+    Filter the feed of a section and write it to its outputfile (runs in the
+    process pool), the downloaded feed is deleted afterwards
+
+    The outputfile is only replaced if the feed was processed successfully.
+    Errors are raised as RuntimeError, since exceptions of lxml cannot be sent
+    back to the main process.
+    """
+    settings = Settings()
+    settings.read_source(section)
+    try:
+        with open(filename, "rb") as infile:
+            with replace_on_success(settings.outputfile) as outfile:
+                settings.feedfile = infile
+                process(settings, outfile=outfile)
+    except Exception as err:
+        raise RuntimeError("%s: %s" % (type(err).__name__, err)) from None
+    finally:
+        os.remove(filename)
+    return os.path.getsize(settings.outputfile)
+
+
+def main():
+    # setup gettext
+    gettext.textdomain("feedfilter")
+
+    # Start Logger with the default settings
+    settings = Settings()
+    settings.read_defaults()
+    logger.setupLogger(settings)
+
+    sections = sys.argv[1:] or [
+        title
+        for title, section in settings.configs.items()
+        if title != settings.configs.default_section and "url" in section
+    ]
+
+    results = {}
+    fetch_pool = ThreadPoolExecutor(settings.fetch_workers)
+    process_pool = ProcessPoolExecutor(settings.batch_workers or None)
+    with fetch_pool, process_pool:
+        downloads = {fetch_pool.submit(download, name): name for name in sections}
+        runs = {}
+        for future in as_completed(downloads):
+            section = downloads[future]
+            try:
+                runs[process_pool.submit(run, section, future.result())] = section
+            except Exception as err:
+                results[section] = "failed: %s" % err
+        for future in as_completed(runs):
+            section = runs[future]
+            try:
+                results[section] = "ok (%i bytes)" % future.result()
+            except Exception as err:
+                logging.exception("error processing feed %s", section)
+                results[section] = "failed: %s" % err
+
+    for section in sections:
+        print("%s: %s" % (section, results[section]))
+    if any(result.startswith("failed") for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,61 +15,84 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import functools
+import importlib.util
 import logging
 import math
 import os
 import re
 from collections import Counter
-from typing import Tuple
+from typing import Dict, FrozenSet, List, Tuple
 
 filedir = os.path.join(
     os.path.dirname(__file__), os.path.pardir, "include", "commonwords"
 )
 
-common_words = {}
-for lang in os.listdir(filedir):
+
+@functools.lru_cache(maxsize=None)
+def common_words(lang) -> FrozenSet[str]:
+    """
+    Return the common words of a language, read on first use
+
+    Returns None, if there is no list for the language.
+    """
+    if not lang:
+        logging.warning("No commonwords-list available for language %s", lang)
+        return None
+    filename = os.path.join(filedir, os.path.basename(lang))
     try:
-        filename = os.path.join(filedir, lang)
-        common_words[lang] = open(filename, "rU").read().split()
-    except Exception:
-        logging.warning("Can't load file %s", common_words[lang])
+        with open(filename, "r") as infile:
+            return frozenset(infile.read().split())
+    except FileNotFoundError:
+        logging.warning("No commonwords-list available for language %s", lang)
+    except OSError:
+        logging.warning("Can't load file %s", filename)
+    return None
+
+
+def have_numpy():
+    """
+    Check if numpy and scipy are installed, without importing them
+    """
+    return all(importlib.util.find_spec(name) for name in ("numpy", "scipy"))
+
 
 # we remove all special characters from the text before splitting it into words
-specialchar_filter = re.compile("[^\w\s]+", re.UNICODE)
+specialchar_filter = re.compile(r"[^\w\s]+", re.UNICODE)
 
 # For the comparison we ignore all "words"
 # only consisting of digits,
 # of length one and
 # of length two or three witch are not written in UPPER case
-re_filters = ["\d+$", "\w$", "[A-Z][a-z]{1,2}$"]
-compiled_re_filters = (re.compile(i) for i in re_filters)
+short_word = re.compile(r"[A-Z][a-z]{1,2}$")
 
+# Increased whenever analyse changes, so that stored wordlists are recalculated
+VERSION = 2
 
-def analyse(lang, *txt) -> Tuple[Counter, float]:
-    txt = " ".join(txt)
-    txt = specialchar_filter.sub("", txt)
 
-    wordlist = Counter(txt.split())
+def analyse(lang, *txt) -> Tuple[Dict[str, int], float]:
+    """
+    Calculate the wordlist of a text and its norm
 
-    for word in list(wordlist):
-        for re_filter in compiled_re_filters:
-            if re_filter.match(word):
-                del wordlist[word]
+    The words are filtered, lowercased and counted in a single pass over the
+    distinct words of the text.
+    """
+    txt = specialchar_filter.sub("", " ".join(txt))
+    stopwords = common_words(lang) or frozenset()
 
-    wordlist = dict((k.lower(), v) for k, v in wordlist.items())
+    wordlist: Dict[str, int] = {}
+    square_sum = 0
+    for word, count in Counter(txt.split()).items():
+        if len(word) == 1 or word.isdecimal() or short_word.match(word):
+            continue
+        word = word.lower()
+        if word in stopwords:
+            continue
+        old = wordlist.get(word, 0)
+        wordlist[word] = old + count
+        square_sum += (2 * old + count) * count * len(word)
 
-    if lang in common_words:
-        for word in common_words[lang]:
-            try:
-                del wordlist[word]
-            except KeyError:
-                continue
-    else:
-        logging.warning("No commonwords-list available for language %s", lang)
-
-    norm = math.sqrt(sum(value * value * len(key) for key, value in wordlist.items()))
-
-    return (wordlist, norm)
+    return (wordlist, math.sqrt(square_sum))
 
 
 def comp(wordlist_1, wordlist_2):
@@ -88,6 +111,32 @@ def comp(wordlist_1, wordlist_2):
         return sp / n
 
 
+def similarity_matrix(wordlists: List[Tuple[Dict[str, int], float]]):
+    """
+    Compare all wordlists with each other at once
+
+    Returns a sparse matrix, whose entry (i, j) is comp(wordlists[i],
+    wordlists[j]). Needs numpy and scipy.
+    """
+    import numpy
+    import scipy.sparse
+
+    vocabulary = {}
+    rows, cols, data = [], [], []
+    for row, (wordlist, norm) in enumerate(wordlists):
+        for key, value in wordlist.items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(key, len(vocabulary)))
+            data.append(value * math.sqrt(len(key)))
+    matrix = scipy.sparse.csr_matrix(
+        (data, (rows, cols)), shape=(len(wordlists), len(vocabulary)), dtype=float
+    )
+    norms = numpy.array([norm for _, norm in wordlists], dtype=float)
+    inverse = numpy.divide(1.0, norms, out=numpy.zeros_like(norms), where=norms != 0)
+    matrix = scipy.sparse.diags(inverse) @ matrix
+    return (matrix @ matrix.T).tocsr()
+
+
 def comp_txt(txt_1, txt_2):
     dict_1 = analyse(txt_1)
     dict_2 = analyse(txt_2)
@@ -0,0 +1,374 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import logging
+import math
+import random
+import urllib.parse
+import weakref
+import zlib
+
+import comparetext
+
+# Large prime for the universal hash functions used by MinHash
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Query parameters only used to track visitors, besides all utm_* parameters
+TRACKING_PARAMETERS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_hsenc",
+    "_hsmi",
+}
+
+
+class Entry:
+    """
+    What the duplicate detection keeps of an item
+
+    Only the fields needed to compare and link to the item are kept, so that
+    the item itself can be freed, once it is written.
+    """
+
+    __slots__ = ("id", "title", "link", "wordlist", "duplicate_of", "_item")
+
+    def __init__(self, item):
+        self.id = item.id
+        self.title = item.title
+        self.link = item.link
+        self.wordlist = None
+        # The entry of the item this item was removed as a duplicate of
+        self.duplicate_of = None
+        self._item = weakref.ref(item)
+
+    @property
+    def item(self):
+        """
+        The item, or None if it was freed already
+        """
+        return self._item()
+
+
+def entry(item):
+    """
+    Return the Entry of an item, created on first use
+    """
+    if not hasattr(item, "entry"):
+        item.entry = Entry(item)
+    return item.entry
+
+
+class ExactEngine:
+    """
+    Compare every item against all items seen before
+    """
+
+    # Whether the engine needs all analysed items before the comparisons
+    batch = False
+
+    def __init__(self, settings):
+        self.entries = []
+
+    def prepare(self, items):
+        """
+        Receive all analysed items of the feed (only for batch engines)
+        """
+
+    def similar(self, item):
+        """
+        Yield (Entry, similarity) for all previously added items
+        """
+        for other in self.entries:
+            yield other, comparetext.comp(item.wordlist, other.wordlist)
+
+    def add(self, item):
+        """
+        Make an analysed item available for later comparisons
+        """
+        added = entry(item)
+        added.wordlist = item.wordlist
+        self.entries.append(added)
+
+
+class LSHEngine(ExactEngine):
+    """
+    Only compare against items proposed by a MinHash/LSH index
+
+    The wordsets of the items are reduced to MinHash signatures, which are
+    split into `lsh_bands` bands of `lsh_rows` rows each. Two items become
+    candidates if they agree on all rows of at least one band. Candidates are
+    then compared with the usual weighted cosine similarity. More bands and
+    fewer rows increase recall, fewer bands and more rows increase speed.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.bands = settings.lsh_bands
+        self.rows = settings.lsh_rows
+        self.hashes = minhash_functions(self.bands * self.rows)
+        self.buckets = [{} for _ in range(self.bands)]
+
+    def similar(self, item):
+        """
+        Yield (Entry, similarity) for all candidates of the index
+        """
+        candidates = set()
+        for band, key in enumerate(self._band_keys(item)):
+            candidates.update(self.buckets[band].get(key, ()))
+        # keep the order of insertion, so merges happen as in the exact engine
+        for index in sorted(candidates):
+            other = self.entries[index]
+            yield other, comparetext.comp(item.wordlist, other.wordlist)
+
+    def add(self, item):
+        index = len(self.entries)
+        super().add(item)
+        for band, key in enumerate(self._band_keys(item)):
+            self.buckets[band].setdefault(key, []).append(index)
+
+    def _band_keys(self, item):
+        if not hasattr(item, "signature"):
+            item.signature = minhash(item.wordlist[0], self.hashes)
+        signature = item.signature
+        if signature is None:
+            return []
+        return [
+            tuple(signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+
+class MatrixEngine(ExactEngine):
+    """
+    Compare all items at once with a sparse matrix product
+
+    Gives the same results as the exact engine, but needs numpy and scipy.
+    """
+
+    batch = True
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.rows = {}
+        self.prepared = []
+        self.added = set()
+        self.matrix = None
+
+    def prepare(self, items):
+        items = list(items)
+        self.rows = {id(item): row for row, item in enumerate(items)}
+        self.matrix = comparetext.similarity_matrix([item.wordlist for item in items])
+        self.prepared = [entry(item) for item in items]
+
+    def similar(self, item):
+        """
+        Yield (Entry, similarity) for all previously added items
+        """
+        row = self.matrix.getrow(self.rows[id(item)])
+        for index, similarity in sorted(zip(row.indices, row.data)):
+            if index in self.added:
+                yield self.prepared[index], similarity
+
+    def add(self, item):
+        entry(item).wordlist = item.wordlist
+        self.added.add(self.rows[id(item)])
+
+
+class ClusterEngine(ExactEngine):
+    """
+    Compare every item only against one centroid per story
+
+    Every item either joins the most similar cluster, if the similarity to
+    its centroid exceeds cmp_threshold, or starts a new cluster. The centroid
+    is the sum of the wordlists of all items of the cluster, so the number of
+    comparisons grows with the number of stories instead of items. An
+    inverted index from words to clusters restricts the comparisons to the
+    clusters sharing at least one word with the item. Duplicates are merged
+    into the first item of their cluster only, so only its Entry is kept.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.cmp_threshold = settings.cmp_threshold
+        # The Entry of the first item, the centroid and the squared norm of
+        # every cluster
+        self.clusters = []
+        # The clusters whose centroid contains a word, by word
+        self.index = {}
+
+    def _best_cluster(self, item):
+        if hasattr(item, "cluster"):
+            return item.cluster, item.cluster_similarity
+        wordlist, norm = item.wordlist
+        products = {}
+        for word, count in wordlist.items():
+            for cluster in self.index.get(word, ()):
+                centroid = self.clusters[cluster][1]
+                products[cluster] = (
+                    products.get(cluster, 0) + count * centroid[word] * len(word)
+                )
+        item.cluster, item.cluster_similarity = None, 0
+        for cluster in sorted(products):
+            similarity = products[cluster] / (
+                norm * math.sqrt(self.clusters[cluster][2])
+            )
+            if similarity > item.cluster_similarity:
+                item.cluster, item.cluster_similarity = cluster, similarity
+        return item.cluster, item.cluster_similarity
+
+    def similar(self, item):
+        """
+        Yield (Entry of the first item, similarity) of the most similar cluster
+        """
+        cluster, similarity = self._best_cluster(item)
+        if cluster is not None:
+            yield self.clusters[cluster][0], similarity
+
+    def add(self, item):
+        cluster, similarity = self._best_cluster(item)
+        if cluster is None or similarity <= self.cmp_threshold:
+            cluster = len(self.clusters)
+            self.clusters.append([entry(item), {}, 0])
+        centroid = self.clusters[cluster][1]
+        square_sum = self.clusters[cluster][2]
+        for word, count in item.wordlist[0].items():
+            old = centroid.get(word, 0)
+            if old == 0:
+                self.index.setdefault(word, []).append(cluster)
+            centroid[word] = old + count
+            square_sum += (2 * old + count) * count * len(word)
+        self.clusters[cluster][2] = square_sum
+
+
+class DuplicateKeys:
+    """
+    Find reposts by their normalised title, link or guid
+
+    This is a cheap first tier of the duplicate detection: items found here
+    are not analysed at all. Titles are compared case-insensitively and
+    without punctuation, links without scheme, fragment and tracking
+    parameters.
+    """
+
+    def __init__(self):
+        # The Entry of the first item with each key
+        self.keys = {}
+
+    @staticmethod
+    def _keys(item):
+        title = " ".join(
+            comparetext.specialchar_filter.sub("", item.title or "").lower().split()
+        )
+        if title:
+            yield "title", title
+        if item.link:
+            yield "link", canonical_link(item.link)
+        if item.id:
+            yield "guid", item.id
+
+    def check(self, item):
+        """
+        Return the Entry of the first earlier item sharing a key with the item
+        or None
+
+        Every item is only registered once, later calls return the same result.
+        """
+        if not hasattr(item, "repost_of"):
+            original = None
+            for key in self._keys(item):
+                original = original or self.keys.get(key)
+                self.keys.setdefault(key, entry(item))
+            item.repost_of = original
+        return item.repost_of
+
+
+def canonical_link(link):
+    """
+    Normalise a link, so that links to the same page are equal
+    """
+    url = urllib.parse.urlsplit(link.strip())
+    query = [
+        (name, value)
+        for name, value in urllib.parse.parse_qsl(url.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_")
+        and name.lower() not in TRACKING_PARAMETERS
+    ]
+    return urllib.parse.urlunsplit(
+        (
+            "",
+            url.netloc.lower(),
+            url.path.rstrip("/"),
+            urllib.parse.urlencode(query),
+            "",
+        )
+    )
+
+
+def minhash_functions(count, seed=1):
+    """
+    Create the parameters of `count` universal hash functions
+
+    A fixed seed is used, so signatures are stable across runs.
+    """
+    rand = random.Random(seed)
+    return [
+        (rand.randrange(1, MERSENNE_PRIME), rand.randrange(0, MERSENNE_PRIME))
+        for _ in range(count)
+    ]
+
+
+def minhash(words, hashes):
+    """
+    Calculate the MinHash signature of a set of words
+
+    Returns None for an empty set.
+    """
+    if not words:
+        return None
+    values = [zlib.crc32(word.encode("utf-8")) for word in words]
+    return tuple(
+        min((a * value + b) % MERSENNE_PRIME for value in values) for a, b in hashes
+    )
+
+
+engines = {
+    "exact": ExactEngine,
+    "lsh": LSHEngine,
+    "matrix": MatrixEngine,
+    "cluster": ClusterEngine,
+}
+
+
+def get_engine(settings):
+    """
+    Create the duplicate detection engine selected in the settings
+    """
+    try:
+        engine = engines[settings.cmp_engine]
+    except KeyError:
+        raise ValueError("Unknown cmp_engine: %s" % settings.cmp_engine)
+    if engine is MatrixEngine and not comparetext.have_numpy():
+        logging.warning("numpy or scipy not available, using cmp_engine exact")
+        engine = ExactEngine
+    return engine(settings)
@@ -15,20 +15,29 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
-import xml.etree.ElementTree as etree
-
+from . import backend
 from .atom import ATOM_URL, AtomFeed
+from .feed import FeedWriter
 from .rss import RssFeed
 
 
-def get_feed(feed_file):
+def get_feed(feed_file, stream=False):
     """
     Determine the format of the feed and parse it
+
+    If stream is set, only the beginning of the feed is parsed and the items
+    are parsed while iterating over the feed.
     """
-    tree = etree.parse(feed_file)
-    root = tree.getroot()
+    if stream:
+        events = backend.iterparse(feed_file)
+        _, root = next(events)
+        tree = backend.etree.ElementTree(root)
+    else:
+        events = None
+        tree = backend.parse(feed_file)
+        root = tree.getroot()
     if root.tag == "{%s}feed" % ATOM_URL:
-        return AtomFeed(tree)
+        return AtomFeed(tree, events)
     if root.tag == "rss":
-        return RssFeed(tree)
+        return RssFeed(tree, events)
     raise NotImplementedError("Unknown feedformat!")
@@ -1,5 +1,3 @@
-import xml.etree.ElementTree as etree
-
 from .content import HTMLContent, NoContent, TextContent
 from .xml import XMLFeed, XMLFeedItem
 
@@ -48,7 +46,7 @@ class AtomFeedItem(XMLFeedItem):
 
     def get_description(self):
         """ The description of the news-item """
-        element = self.data.find("{%s}summary" % ATOM_URL)
+        element = self._find_("{%s}summary" % ATOM_URL)
         if element is None:
             return NoContent()
         ctype = element.attrib.get("type", "text")
@@ -65,7 +63,7 @@ class AtomFeedItem(XMLFeedItem):
 
     def get_content(self):
         """ The content of the news-item """
-        element = self.data.find("{%s}content" % ATOM_URL)
+        element = self._find_("{%s}content" % ATOM_URL)
         if element is None:
             return NoContent()
         ctype = element.attrib.get("type", "text")
@@ -87,7 +85,7 @@ class AtomFeedItem(XMLFeedItem):
     def get_link(self):
         """ The link of the news-item """
         try:
-            link = self.item.find("{%s}link" % ATOM_URL)
+            link = self._find_("{%s}link" % ATOM_URL)
             return link.attrib["href"]
         except Exception:
             # This should never happen, handling necessary?
@@ -104,10 +102,18 @@ class AtomFeed(XMLFeed):
     """
 
     Content_Type = AtomFeedItem
+    Item_Tag = "{%s}entry" % ATOM_URL
+    Container_Tag = "{%s}feed" % ATOM_URL
+    Default_Namespace = ATOM_URL
 
     def _get_children_(self):
+        if self.streaming:
+            return self._stream_children_()
         return self.root.iterfind("{%s}entry" % ATOM_URL)
 
+    def _find_container_(self):
+        return self.root
+
     @property
     def lang(self):
         """
@@ -117,18 +123,3 @@ class AtomFeed(XMLFeed):
             return self.root.attrib["{%s}lang" % XML_URL].lower()
         except Exception:
             return ""
-
-    def remove_item(self, child):
-        """
-        Remove an item from the feed
-        """
-        super().remove_item(child)
-        self.root.remove(child.item)
-
-    def write(self, filename, encoding="UTF-8"):
-        """
-        Write the feed to a file
-        """
-        super().write(filename, encoding)
-        etree.register_namespace("", ATOM_URL)
-        self.tree.write(filename, encoding=encoding, xml_declaration=True)
@@ -0,0 +1,124 @@
+"""
+The XML library used to parse and write feeds
+
+lxml is used if it is installed, otherwise xml.etree.ElementTree from the
+standard library. The environmental variable FEED_FILTER_XML_BACKEND can be
+set to "etree" to force the use of the standard library.
+"""
+import contextlib
+import os
+import threading
+
+etree = None
+if os.getenv("FEED_FILTER_XML_BACKEND", "lxml") == "lxml":
+    try:
+        from lxml import etree
+    except ImportError:
+        pass
+if etree is None:
+    import xml.etree.ElementTree as etree
+
+BACKEND = etree.__name__
+
+# Feeds are untrusted, so lxml must neither expand entities nor load anything
+# from the network. The standard library does neither anyway.
+if BACKEND == "lxml.etree":
+    PARSER_OPTIONS = {"resolve_entities": False, "no_network": True}
+else:
+    PARSER_OPTIONS = {}
+
+_namespace_lock = threading.Lock()
+
+
+def parse(feed_file):
+    """
+    Parse a complete feed
+    """
+    if BACKEND == "lxml.etree":
+        return etree.parse(feed_file, etree.XMLParser(**PARSER_OPTIONS))
+    return etree.parse(feed_file)
+
+
+def iterparse(feed_file):
+    """
+    Parse a feed incrementally, yielding (event, element) for every start and
+    end of an element
+    """
+    return etree.iterparse(feed_file, events=("start", "end"), **PARSER_OPTIONS)
+
+
+@contextlib.contextmanager
+def _default_namespace(uri):
+    """
+    Write the namespace uri without prefix, while the context is active
+
+    The standard library only knows global prefixes and its default_namespace
+    option rejects attributes without namespace, so the prefix is set for a
+    single serialisation. All serialisations hold a lock, so that no other
+    thread sees the prefix. lxml keeps the prefixes of the parsed document.
+    """
+    if BACKEND == "lxml.etree":
+        yield
+        return
+    with _namespace_lock:
+        if uri is None:
+            yield
+            return
+        namespaces = etree._namespace_map
+        previous = namespaces.get(uri)
+        namespaces[uri] = ""
+        try:
+            yield
+        finally:
+            if previous is None:
+                del namespaces[uri]
+            else:
+                namespaces[uri] = previous
+
+
+def tostring(element, default_namespace=None, **options):
+    """
+    Serialise an element, using no prefix for the default_namespace
+    """
+    with _default_namespace(default_namespace):
+        return etree.tostring(element, **options)
+
+
+def write(tree, file, default_namespace=None, **options):
+    """
+    Write a document, using no prefix for the default_namespace
+    """
+    with _default_namespace(default_namespace):
+        tree.write(file, **options)
+
+
+def declare_namespaces(tree, namespaces):
+    """
+    Declare the namespaces, by their prefix, once on the root element
+
+    lxml declares the namespace of a new element on the element itself, if no
+    ancestor declares it, so every item would repeat the declaration. The
+    standard library declares all namespaces on the root when writing anyway.
+    """
+    if BACKEND == "lxml.etree":
+        etree.cleanup_namespaces(tree, top_nsmap=namespaces)
+
+
+def shallow_copy(element):
+    """
+    Copy an element without its children
+    """
+    if BACKEND == "lxml.etree":
+        copy = etree.Element(element.tag, dict(element.attrib), nsmap=element.nsmap)
+    else:
+        copy = etree.Element(element.tag, dict(element.attrib))
+    copy.text = element.text
+    copy.tail = element.tail
+    return copy
+
+
+def marker(tag):
+    """
+    The serialisation of an empty element, as written by the backend
+    """
+    return etree.tostring(etree.Element(tag))
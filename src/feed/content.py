@@ -1,6 +1,39 @@
 from abc import ABC, abstractmethod
+from html.parser import HTMLParser
 
-from bs4 import BeautifulSoup
+
+class TextExtractor(HTMLParser):
+    """
+    Collect the text of an HTML document, without tags and attributes
+    """
+
+    skip_tags = ("script", "style")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skip_tags:
+            self.skip += 1
+        self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self.skip_tags and self.skip:
+            self.skip -= 1
+        self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(data)
+
+    @classmethod
+    def extract(cls, html):
+        parser = cls()
+        parser.feed(html)
+        parser.close()
+        return "".join(parser.parts)
 
 
 class Content(ABC):
@@ -20,6 +53,13 @@ class Content(ABC):
     def append_stats(self, lvl, threshold, maxsim):
         pass
 
+    @property
+    @abstractmethod
+    def text(self):
+        """
+        The content as plain text, without any markup
+        """
+
 
 class TextContent(Content):
     def __init__(self, content):
@@ -42,22 +82,51 @@ class TextContent(Content):
             maxsim,
         )
 
+    @property
+    def text(self):
+        return self.content
+
     def __str__(self):
         return self.content
 
 
 class HTMLContent(Content):
+    """
+    HTML content, only parsed when it is modified
+    """
+
     def __init__(self, content):
         super().__init__(content)
-        self.content = BeautifulSoup(content, "html.parser")
+        self.raw = content
+        self._soup = None
+        self._text = None
+
+    @property
+    def content(self):
+        """
+        The parsed HTML
+        """
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+
+            self._soup = BeautifulSoup(self.raw, "html.parser")
+        return self._soup
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = TextExtractor.extract(str(self))
+        return self._text
 
     def append_text(self, text):
+        self._text = None
         body = self.content.find("body") or self.content
         p = self.content.new_tag("p")
         p.append(text)
         body.append(p)
 
     def append_links(self, links):
+        self._text = None
         body = self.content.find("body") or self.content
         ulist = self.content.new_tag("ul")
         body.append(ulist)
@@ -70,6 +139,7 @@ class HTMLContent(Content):
             li.append(link)
 
     def append_stats(self, lvl, threshold, maxsim):
+        self._text = None
         body = self.content.find("body") or self.content
         container = self.content.new_tag("small")
         container.string = "lvl: %.2g/%g maxcmplvl: %.2f" % (
@@ -81,7 +151,9 @@ class HTMLContent(Content):
         body.append(container)
 
     def __str__(self):
-        return str(self.content)
+        if self._soup is None:
+            return self.raw
+        return str(self._soup)
 
 
 class NoContent(Content):
@@ -97,5 +169,9 @@ class NoContent(Content):
     def append_stats(self, lvl, threshold, maxsim):
         pass
 
+    @property
+    def text(self):
+        return ""
+
     def __str__(self):
         return ""
@@ -1,6 +1,7 @@
+import io
 import sys
 from abc import ABC, abstractmethod
-from collections import OrderedDict
+from collections import OrderedDict, deque
 
 from .content import Content
 
@@ -36,6 +37,9 @@ class FeedItem(ABC):
         self.merged_items = []
 
     def merge_item(self, item):
+        """
+        Link to a duplicate of this item, which only needs a title and a link
+        """
         self.merged_items.append(item)
 
     def append_crosslinks(self):
@@ -70,6 +74,9 @@ class Feed(ABC):
     Parse and modify an Atom or RSS-Feed
     """
 
+    # Whether the items are parsed while iterating over the feed
+    streaming = False
+
     @property
     def Content_Type(self):
         raise NotImplementedError
@@ -78,17 +85,38 @@ class Feed(ABC):
         """
         Initiate the Feed
         """
+        # The parsed items, which are not released yet, by their identity,
+        # since several items can share the same (or no) id
         self.childen = OrderedDict()
-        for rawchild in self._get_children_():
+        self._unparsed = self._get_children_()
+        if not self.streaming:
+            for _ in self._parse_children():
+                pass
+
+    def _parse_children(self):
+        """
+        Parse the remaining items, yielding each as soon as it is parsed
+        """
+        for rawchild in self._unparsed:
             child = self.Content_Type(rawchild)
-            self.childen[child.id] = child
+            self.childen[id(child)] = child
+            yield child
+
+    def _forget_(self, child):
+        """
+        Drop an item, that is not needed anymore, so it can be freed
+        """
+        self.childen.pop(id(child), None)
 
     def get_child(self, index):
         """
         Gets a child by its id
         """
         assert isinstance(index, str)
-        return self.childen[index]
+        for child in self.childen.values():
+            if child.id == index:
+                return child
+        raise KeyError(index)
 
     @abstractmethod
     def _get_children_(self):
@@ -98,8 +126,14 @@ class Feed(ABC):
         """
         Get all news-items in the feed
         """
+        if self.streaming:
+            return self._iter_streaming()
         return iter(self.childen.values())
 
+    def _iter_streaming(self):
+        yield from list(self.childen.values())
+        yield from self._parse_children()
+
     @property
     @abstractmethod
     def lang(self):
@@ -112,7 +146,7 @@ class Feed(ABC):
         """
         Remove an item from the feed
         """
-        self.childen[child.id].deleted = True
+        child.deleted = True
 
     def sync(self):
         """
@@ -132,4 +166,87 @@ class Feed(ABC):
         """
         Write the feed to stdout
         """
-        self.write(sys.stdout, encoding="Unicode")
+        sys.stdout.buffer.write(self.tostring())
+
+    @abstractmethod
+    def header(self):
+        """
+        Serialise everything in front of the news-items
+        """
+
+    @abstractmethod
+    def serialize_item(self, child):
+        """
+        Serialise a single news-item
+        """
+
+    @abstractmethod
+    def footer(self):
+        """
+        Serialise everything after the news-items
+        """
+
+    @abstractmethod
+    def release(self, child):
+        """
+        Free the memory of an item that was written already
+        """
+
+    def tostring(self, encoding="UTF-8"):
+        """
+        Return the feed as bytes
+        """
+        buffer = io.BytesIO()
+        self.write(buffer, encoding)
+        return buffer.getvalue()
+
+
+class FeedWriter:
+    """
+    Write a feed item by item, while it is still being processed
+
+    At least the last `window` kept items are held back, so that duplicates
+    found later can still be linked from them. Items are written in batches,
+    `prepare` is called with every batch before it is written.
+    """
+
+    def __init__(self, feed, outfile, window=0, prepare=None):
+        self.feed = feed
+        self.outfile = outfile
+        self.window = window
+        self.prepare = prepare
+        self.pending = deque()
+        self.outfile.write(self.feed.header())
+
+    def add(self, child):
+        """
+        Queue a decided item for writing
+        """
+        if child.deleted:
+            return
+        self.pending.append(child)
+        if len(self.pending) > 2 * self.window:
+            self._write(len(self.pending) - self.window)
+
+    def _write(self, count):
+        batch = [self.pending.popleft() for _ in range(count)]
+        batch = [child for child in batch if not child.deleted]
+        if self.prepare is not None:
+            self.prepare(batch)
+        for child in batch:
+            child.sync()
+            self.outfile.write(self.feed.serialize_item(child))
+            self.feed.release(child)
+
+    def flush(self):
+        """
+        Write all remaining items
+        """
+        self._write(len(self.pending))
+
+    def close(self):
+        """
+        Write all remaining items and the end of the feed
+        """
+        self.flush()
+        self.outfile.write(self.feed.footer())
@@ -73,9 +73,17 @@ class RssFeed(XMLFeed):
     """
 
     Content_Type = RSSFeedItem
+    Item_Tag = "item"
+    Container_Tag = "channel"
+    Namespaces = {"content": RSS_URL}
 
     def _get_children_(self):
-        return self.root.find("channel").iterfind("item")
+        if self.streaming:
+            return self._stream_children_()
+        return self._container_().iterfind("item")
+
+    def _find_container_(self):
+        return self.root.find("channel")
 
     @property
     def lang(self):
@@ -83,20 +91,6 @@ class RssFeed(XMLFeed):
         The language of the feed
         """
         try:
-            return self.root.find("channel").find("language").text.lower()
+            return self._container_().find("language").text.lower()
         except Exception:
             return ""
-
-    def remove_item(self, child):
-        """
-        Remove an item from the feed
-        """
-        super().remove_item(child)
-        self.root.find("channel").remove(child.item)
-
-    def write(self, filename, encoding="UTF-8"):
-        """
-        Write the feed to a file
-        """
-        super().write(filename, encoding)
-        self.tree.write(filename, encoding=encoding, xml_declaration=True)
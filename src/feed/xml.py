@@ -1,13 +1,41 @@
-import xml.etree.ElementTree as etree
+import copy
 
+from . import backend
+from .backend import etree, marker, shallow_copy
+from .content import NoContent
 from .feed import Feed, FeedItem
 
+# Placeholder for the items when serialising the rest of the feed
+MARKER = "feedfilter-items"
+# Number of removed items after which they are dropped from the tree
+COMPACT_SIZE = 64
+
 
 class XMLFeedItem(FeedItem):
     """
     Represents one item of a XML based feed.
     """
 
+    _children = None
+
+    def _children_(self):
+        """
+        The child elements of the item by their tag, collected in one pass
+        """
+        if self._children is None:
+            self._children = {}
+            for element in self.data:
+                if isinstance(element.tag, str):
+                    self._children.setdefault(element.tag, []).append(element)
+        return self._children
+
+    def _find_(self, tag_name):
+        """
+        Get the first child element with the given tag or None
+        """
+        elements = self._children_().get(tag_name)
+        return elements[0] if elements else None
+
     def _find_or_create_(self, tag_name, search_in=None):
         """
         Search a tag of type `tag_name` and create if not existing.
@@ -15,7 +43,12 @@ class XMLFeedItem(FeedItem):
         Will search in `search_in` or in self.item is not provided. Finds only
         direct child entities.
         """
-        search_in = search_in or self.data
+        if search_in is None:
+            element = self._find_(tag_name)
+            if element is None:
+                element = etree.SubElement(self.data, tag_name)
+                self._children_()[tag_name] = [element]
+            return element
         element = search_in.find(tag_name)
         if element is None:
             element = etree.SubElement(search_in, tag_name)
@@ -26,7 +59,7 @@ class XMLFeedItem(FeedItem):
         Get the text content of an element with given name
         """
         try:
-            elements = self.data.findall(element_name)
+            elements = self._children_().get(element_name, [])
             texts = [element.text.strip() for element in elements]
             return " ".join(texts)
         except Exception:
@@ -44,10 +77,187 @@ class XMLFeedItem(FeedItem):
 
 
 class XMLFeed(Feed):
-    def __init__(self, tree):
+    # The tag of the news-items and of the element containing them
+    Item_Tag = None
+    Container_Tag = None
+    # The namespace written without prefix
+    Default_Namespace = None
+    # The namespaces of elements created by feedfilter, by their prefix
+    Namespaces = {}
+
+    def __init__(self, tree, events=None):
         """
         Initiate the Feed
+
+        tree: the (partially) parsed feed
+        events: iterator of the remaining iterparse events, to parse the items
+        only while iterating over the feed
         """
         self.tree = tree
         self.root = self.tree.getroot()
+        self.events = events
+        self.streaming = events is not None
+        self._stack = [self.root]
+        self._container_element = None
+        self._removed_ = set()
+        if self.streaming:
+            self._read_header_()
+        self._header_ = self._leading_elements_()
         super().__init__()
+
+    def _find_container_(self):
+        """
+        Search the element containing the news-items
+        """
+        raise NotImplementedError
+
+    def _container_(self):
+        """
+        The element containing the news-items
+        """
+        if self._container_element is None:
+            self._container_element = self._find_container_()
+        return self._container_element
+
+    def _leading_elements_(self):
+        """
+        The elements of the container in front of the first news-item
+
+        While streaming, the parser may already have added elements following
+        the items to the tree, they belong to the footer.
+        """
+        leading = []
+        for element in self._container_():
+            if element.tag == self.Item_Tag:
+                break
+            leading.append(element)
+        return leading
+
+    def _compact_(self):
+        """
+        Drop all removed items from the tree at once
+        """
+        if self._removed_:
+            container = self._container_()
+            container[:] = [
+                element for element in container if id(element) not in self._removed_
+            ]
+            self._removed_.clear()
+
+    def _frame_(self):
+        """
+        Serialise the feed without its items and split it where they belong
+        """
+        self._compact_()
+        container = self._container_()
+        header_ids = set(id(element) for element in self._header_)
+        trailer = [
+            element
+            for element in container
+            if element.tag != self.Item_Tag and id(element) not in header_ids
+        ]
+        frame = shallow_copy(container)
+        # copies, since lxml elements can only have one parent
+        frame.extend(copy.deepcopy(element) for element in self._header_)
+        frame.append(etree.Element(MARKER))
+        frame.extend(copy.deepcopy(element) for element in trailer)
+        if container is not self.root:
+            root = shallow_copy(self.root)
+            root.append(frame)
+            frame = root
+        data = backend.tostring(
+            frame, self.Default_Namespace, encoding="UTF-8", xml_declaration=True
+        )
+        header, _, footer = data.partition(marker(MARKER))
+        return header, footer
+
+    def header(self):
+        return self._frame_()[0]
+
+    def footer(self):
+        return self._frame_()[1]
+
+    def serialize_item(self, child):
+        return backend.tostring(child.item, self.Default_Namespace, encoding="UTF-8")
+
+    def release(self, child):
+        self._remove_element_(child.item)
+        self._forget_(child)
+        child.item.clear()
+        child.description = NoContent()
+        child.content = NoContent()
+
+    def _read_header_(self):
+        """
+        Parse everything in front of the first news-item
+        """
+        self._pending_ = None
+        for event, element in self.events:
+            is_item = self._is_item_(event, element)
+            self._track_(event, element)
+            if is_item:
+                self._pending_ = element
+                return
+
+    def _is_item_(self, event, element):
+        return (
+            event == "start"
+            and element.tag == self.Item_Tag
+            and self._stack[-1].tag == self.Container_Tag
+        )
+
+    def _track_(self, event, element):
+        if event == "start":
+            self._stack.append(element)
+        else:
+            self._stack.pop()
+
+    def _stream_children_(self):
+        """
+        Yield every news-item as soon as it is completely parsed
+        """
+        item = self._pending_
+        for event, element in self.events:
+            if item is None and self._is_item_(event, element):
+                item = element
+            self._track_(event, element)
+            if event == "end" and element is item:
+                yield element
+                item = None
+
+    def remove_item(self, child):
+        """
+        Remove an item from the feed
+        """
+        super().remove_item(child)
+        self._remove_element_(child.item)
+        if self.streaming:
+            # release the memory of the item right away
+            self._forget_(child)
+            child.item.clear()
+
+    def _remove_element_(self, element):
+        """
+        Mark an element for removal, it is dropped from the tree later
+        """
+        self._removed_.add(id(element))
+        if self.streaming and len(self._removed_) >= COMPACT_SIZE:
+            self._compact_()
+
+    def sync(self):
+        self._compact_()
+        super().sync()
+
+    def write(self, filename, encoding="UTF-8"):
+        """
+        Write the feed to a file
+        """
+        super().write(filename, encoding)
+        backend.declare_namespaces(self.tree, self.Namespaces)
+        backend.write(
+            self.tree,
+            filename,
+            self.Default_Namespace,
+            encoding=encoding,
+            xml_declaration=True,
+        )
@@ -0,0 +1,104 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import urllib.error
+import urllib.request
+
+# Feeds bigger than this are kept in a temporary file instead of memory
+SPOOL_SIZE = 1 << 20
+
+
+def fetch(url, cachedir, timeout=None):
+    """
+    Download a feed and return it as seekable binary file object
+
+    Responses of http(s) urls are stored in cachedir together with their
+    ETag and Last-Modified header. The next request for the same url is sent
+    as conditional request and the stored body is reused if the server
+    answers with 304 Not Modified.
+    """
+    if not url.startswith("http"):
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return _spool(response)
+
+    key = hashlib.sha1(url.encode()).hexdigest()
+    metafile = os.path.join(cachedir, "http", key + ".json")
+    bodyfile = os.path.join(cachedir, "http", key + ".body")
+    request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    try:
+        with open(metafile) as infile:
+            meta = json.load(infile)
+        if os.path.exists(bodyfile):
+            if meta.get("etag"):
+                request.add_header("If-None-Match", meta["etag"])
+            if meta.get("last_modified"):
+                request.add_header("If-Modified-Since", meta["last_modified"])
+    except (OSError, ValueError):
+        pass
+
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as err:
+        if err.code == 304:
+            logging.info("feed not modified: %s", url)
+            return open(bodyfile, "rb")
+        raise
+    with response:
+        if response.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = _spool(gzip.GzipFile(fileobj=response))
+        else:
+            body = _spool(response)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    try:
+        os.makedirs(os.path.dirname(bodyfile), exist_ok=True)
+        _write_atomic(bodyfile, body)
+        _write_atomic(metafile, io.BytesIO(json.dumps(meta).encode()))
+    except OSError:
+        logging.warning("cannot write fetch cache for: " + url)
+    body.seek(0)
+    return body
+
+
+def _spool(infile):
+    """
+    Copy a stream into a temporary file, kept in memory while it is small
+    """
+    spool = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+    shutil.copyfileobj(infile, spool)
+    spool.seek(0)
+    return spool
+
+
+def _write_atomic(filename, infile):
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(filename), delete=False
+    ) as outfile:
+        shutil.copyfileobj(infile, outfile)
+    os.replace(outfile.name, filename)
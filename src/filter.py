@@ -15,9 +15,14 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import hashlib
 import logging
 import os
+import pickle
 import re
+import tempfile
+
+from matcher import Automaton
 
 
 class Filter:
@@ -30,10 +35,80 @@ class Filter:
         Initialise the filter
 
         filterdir: the directory in witch the filterlists are located
+        cachedir: the directory in witch compiled filterlists are stored
         """
         self.blackwords = {}
         self.exactblackwords = {}
         self.filterdir = settings.confdir
+        self.cachedir = settings.cachedir
+        self.signature = None
+        self.sources = []
+        self.matcher = None
+        self.exactmatcher = None
+        self._negative_weight = None
+
+    def load(self, *filenames):
+        """
+        Read several filterlists, using the compiled cache if it is up to date
+
+        filenames: the filenames, relative to filterdir
+
+        The cache is invalidated if the modification time or size of any of
+        the files changes.
+        """
+        paths = [os.path.join(self.filterdir, filename) for filename in filenames]
+        signature = [self._stat(path) for path in paths]
+        self.sources = list(zip(paths, signature))
+        self.signature = hashlib.sha1(repr((paths, signature)).encode()).hexdigest()
+        cachefile = os.path.join(
+            self.cachedir,
+            "filter-%s.pickle" % hashlib.sha1("\0".join(paths).encode()).hexdigest(),
+        )
+        try:
+            with open(cachefile, "rb") as infile:
+                cached = pickle.load(infile)
+            if cached["signature"] == signature:
+                self.blackwords = cached["blackwords"]
+                self.exactblackwords = cached["exactblackwords"]
+                self.matcher = cached["matcher"]
+                self.exactmatcher = cached["exactmatcher"]
+                return
+        except Exception:
+            pass
+
+        for filename in filenames:
+            self.read_filterlist(filename)
+        self._compile()
+        cached = {
+            "signature": signature,
+            "blackwords": self.blackwords,
+            "exactblackwords": self.exactblackwords,
+            "matcher": self.matcher,
+            "exactmatcher": self.exactmatcher,
+        }
+        try:
+            os.makedirs(self.cachedir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.cachedir, delete=False
+            ) as outfile:
+                pickle.dump(cached, outfile, pickle.HIGHEST_PROTOCOL)
+            os.replace(outfile.name, cachefile)
+        except OSError:
+            logging.warning("cannot write filter cache: " + cachefile)
+
+    def changed(self):
+        """
+        Check if any of the filterlists read by load() changed since then
+        """
+        return any(self._stat(path) != stat for path, stat in self.sources)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
 
     def read_filterlist(self, filename):
         """
@@ -53,7 +128,7 @@ class Filter:
         """
         c = re.compile("  +")
         try:
-            with open(os.path.join(self.filterdir, filename), "rU") as infile:
+            with open(os.path.join(self.filterdir, filename), "r") as infile:
                 for line in infile:
                     if line[0] == "#":
                         continue
@@ -70,20 +145,59 @@ class Filter:
                         continue
         except IOError:
             logging.warning("error opening file: " + filename)
+        self.matcher = None
+        self._negative_weight = None
+
+    def _compile(self):
+        """
+        Build the automatons used to search the filterstrings
+        """
+        self.matcher = Automaton(self.blackwords)
+        self.exactmatcher = Automaton(self.exactblackwords)
 
-    def check(self, text, multiplier=1):
+    def negative_weight(self):
+        """
+        The sum of all negative filter values, the most a text can lower its
+        level by
+        """
+        if self._negative_weight is None:
+            self._negative_weight = sum(
+                min(value, 0)
+                for words in (self.blackwords, self.exactblackwords)
+                for value in words.values()
+            )
+        return self._negative_weight
+
+    def check(self, text, multiplier=1, limit=None):
         """
         Check a text against the filter
 
         text: the string the filter should be matched against
         multiplier: multiply the weight of all matching filters with this constant
+        limit: stop searching as soon as the level exceeds this value, even if
+        all negative filters not found yet matched. The returned level is then
+        a lower bound of the real level, which exceeds limit.
         """
-        ltext = text.lower()
-        lvl = 0
-        for word in self.blackwords:
-            if ltext.find(word) != -1:
+        if self.matcher is None:
+            self._compile()
+        if limit is None:
+            lvl = 0
+            for word in self.matcher.find(text.lower()):
                 lvl += multiplier * self.blackwords[word]
-        for word in self.exactblackwords:
-            if text.find(word) != -1:
+            for word in self.exactmatcher.find(text):
                 lvl += multiplier * self.exactblackwords[word]
+            return lvl
+
+        lvl = 0
+        # the lowest level the text can still reach
+        lowest = multiplier * self.negative_weight()
+        for matcher, words, text in (
+            (self.matcher, self.blackwords, text.lower()),
+            (self.exactmatcher, self.exactblackwords, text),
+        ):
+            for word in matcher.finditer(text):
+                lvl += multiplier * words[word]
+                lowest += multiplier * max(words[word], 0)
+                if lowest > limit:
+                    return lowest
         return lvl
@@ -0,0 +1,178 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+
+import comparetext
+import dedup
+
+# The index has to be the same for all feeds, so it is not configurable
+BANDS = 32
+ROWS = 2
+
+# Seconds to wait for other processes writing the history
+TIMEOUT = 10
+
+
+class History:
+    """
+    Remember recently published news-items of all feeds
+
+    New items are compared with the remembered ones to find news already
+    published in an earlier run or in another feed. Candidates are looked up
+    with a MinHash/LSH index, so only few items have to be compared. Items are
+    forgotten after history_ttl hours, and only the history_size most recently
+    used items are kept.
+
+    Items are added as soon as they are kept. The items added by the same feed
+    in the current run are not matched, duplicates within a feed are found by
+    the duplicate detection engines.
+    """
+
+    def __init__(self, settings):
+        self.feed = settings.url
+        # Items of the feed added since then are from this run
+        self.started = time.time()
+        self.ttl = settings.history_ttl * 3600
+        self.size = settings.history_size
+        self.cmp_threshold = settings.cmp_threshold
+        self.hashes = dedup.minhash_functions(BANDS * ROWS)
+        self.db = None
+        if self.ttl <= 0:
+            return
+        try:
+            os.makedirs(settings.cachedir, exist_ok=True)
+            self.db = sqlite3.connect(
+                os.path.join(settings.cachedir, "history.sqlite"), timeout=TIMEOUT
+            )
+            self.db.executescript(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " key INTEGER PRIMARY KEY, feed TEXT, id TEXT, title TEXT,"
+                " wordlist TEXT, norm REAL, seen REAL, used REAL,"
+                " UNIQUE (feed, id));"
+                "CREATE TABLE IF NOT EXISTS bands (hash INTEGER, item INTEGER);"
+                "CREATE INDEX IF NOT EXISTS bands_hash ON bands (hash);"
+                "CREATE INDEX IF NOT EXISTS bands_item ON bands (item);"
+            )
+        except sqlite3.Error as err:
+            logging.warning("cannot open history: %s", err)
+            self.db = None
+
+    def _band_hashes(self, wordlist):
+        signature = dedup.minhash(wordlist[0], self.hashes)
+        if signature is None:
+            return []
+        bands = [signature[band * ROWS : (band + 1) * ROWS] for band in range(BANDS)]
+        return [
+            zlib.crc32(repr((band, rows)).encode()) for band, rows in enumerate(bands)
+        ]
+
+    def match(self, child):
+        """
+        Search a remembered item, of which the item is a duplicate
+
+        Returns the title and feed of the remembered item or None.
+        """
+        if self.db is None:
+            return None
+        hashes = self._band_hashes(child.wordlist)
+        if not hashes:
+            return None
+        try:
+            return self._match(child, hashes)
+        except sqlite3.Error as err:
+            logging.warning("cannot read history: %s", err)
+            return None
+
+    def _match(self, child, hashes):
+        rows = self.db.execute(
+            "SELECT key, feed, id, title, wordlist, norm, seen FROM items WHERE key IN"
+            " (SELECT item FROM bands WHERE hash IN (%s))"
+            % ",".join("?" * len(hashes)),
+            hashes,
+        ).fetchall()
+        for key, feed, id, title, wordlist, norm, seen in rows:
+            if feed == self.feed and (id == child.id or seen >= self.started):
+                continue
+            similarity = comparetext.comp(child.wordlist, (json.loads(wordlist), norm))
+            if similarity > self.cmp_threshold:
+                with self.db:
+                    self.db.execute(
+                        "UPDATE items SET used = ? WHERE key = ?", (time.time(), key)
+                    )
+                return title, feed
+        return None
+
+    def add(self, child):
+        """
+        Remember a published item
+        """
+        if self.db is None:
+            return
+        try:
+            with self.db:
+                self._add(child)
+        except sqlite3.Error as err:
+            logging.warning("cannot write history: %s", err)
+
+    def _add(self, child):
+        now = time.time()
+        wordlist, norm = child.wordlist
+        row = self.db.execute(
+            "SELECT key FROM items WHERE feed = ? AND id = ?", (self.feed, child.id)
+        ).fetchone()
+        if row is not None:
+            self.db.execute("UPDATE items SET used = ? WHERE key = ?", (now, row[0]))
+            return
+        key = self.db.execute(
+            "INSERT INTO items (feed, id, title, wordlist, norm, seen, used)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.feed, child.id, child.title, json.dumps(wordlist), norm, now, now),
+        ).lastrowid
+        self.db.executemany(
+            "INSERT INTO bands VALUES (?, ?)",
+            ((band_hash, key) for band_hash in self._band_hashes(child.wordlist)),
+        )
+
+    def close(self):
+        """
+        Forget expired items and write all changes
+        """
+        if self.db is None:
+            return
+        try:
+            with self.db:
+                self.db.execute(
+                    "DELETE FROM items WHERE seen < ?", (time.time() - self.ttl,)
+                )
+                self.db.execute(
+                    "DELETE FROM items WHERE key NOT IN"
+                    " (SELECT key FROM items ORDER BY used DESC LIMIT ?)",
+                    (self.size,),
+                )
+                self.db.execute(
+                    "DELETE FROM bands WHERE item NOT IN (SELECT key FROM items)"
+                )
+        except sqlite3.Error as err:
+            logging.warning("cannot write history: %s", err)
+        self.db.close()
+        self.db = None
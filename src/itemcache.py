@@ -0,0 +1,174 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import analysis
+import comparetext
+
+# Seconds to wait for other processes writing the cache
+TIMEOUT = 10
+
+# Number of new entries written at once
+BATCH_SIZE = 500
+
+
+class ItemCache:
+    """
+    Store the analysis results of news-items between runs
+
+    Items are identified by their id and a hash of their text and the version
+    of the analysis, so changed items are analysed again. The filter level is
+    only reused if it was calculated by the same version of the scoring, with
+    the same filterlists and title_scale (and threshold, with filter_first).
+    Entries not used for item_cache_ttl hours are dropped.
+
+    New entries are collected and written in short transactions of
+    BATCH_SIZE entries, so that several feeds can use the cache at the same
+    time and big feeds do not keep all entries in memory.
+    """
+
+    def __init__(self, settings, filter_key):
+        """
+        settings: the settings, providing cachedir and item_cache_ttl
+        filter_key: identifies the filterlists used to calculate filter levels
+        """
+        self.ttl = settings.item_cache_ttl * 3600
+        self.filter_key = "%i:%s:%g" % (
+            analysis.VERSION, filter_key, settings.title_scale
+        )
+        if settings.filter_first:
+            # levels above the threshold are only lower bounds then
+            self.filter_key += ":%g" % settings.threshold
+        self.rows = {}
+        self.pending = []
+        self.db = None
+        if self.ttl <= 0:
+            return
+        try:
+            os.makedirs(settings.cachedir, exist_ok=True)
+            self.db = sqlite3.connect(
+                os.path.join(settings.cachedir, "items.sqlite"), timeout=TIMEOUT
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " id TEXT, hash TEXT, wordlist TEXT, norm REAL,"
+                " filter TEXT, lvl REAL, used REAL,"
+                " PRIMARY KEY (id, hash))"
+            )
+        except sqlite3.Error as err:
+            logging.warning("cannot open item cache: %s", err)
+            self.db = None
+
+    @staticmethod
+    def _hash(child):
+        if not hasattr(child, "content_hash"):
+            text = "\0".join(
+                (
+                    str(comparetext.VERSION),
+                    child.title,
+                    str(child.description),
+                    str(child.content),
+                    str(child.categories),
+                )
+            )
+            child.content_hash = hashlib.sha1(text.encode()).hexdigest()
+        return child.content_hash
+
+    def lookup(self, child):
+        """
+        Restore the stored wordlist of an item, if there is one
+        """
+        key = (child.id, self._hash(child))
+        if self.db is None or key in self.rows:
+            return
+        try:
+            row = self.db.execute(
+                "SELECT wordlist, norm, filter, lvl FROM items"
+                " WHERE id = ? AND hash = ?",
+                key,
+            ).fetchone()
+        except sqlite3.Error as err:
+            logging.warning("cannot read item cache: %s", err)
+            row = None
+        self.rows[key] = row
+        if row is None:
+            return
+        child.wordlist = (json.loads(row[0]), row[1])
+
+    def lvl(self, child):
+        """
+        Return the stored filter level of an item or None
+        """
+        row = self.rows.get((child.id, self._hash(child)))
+        if row is None or row[2] != self.filter_key:
+            return None
+        return row[3]
+
+    def store(self, child, lvl=None):
+        """
+        Store the wordlist and filter level of an item
+        """
+        if self.db is None or not hasattr(child, "wordlist"):
+            return
+        wordlist, norm = child.wordlist
+        self.pending.append(
+            (
+                child.id,
+                self._hash(child),
+                json.dumps(wordlist),
+                norm,
+                self.filter_key,
+                lvl,
+                time.time(),
+            )
+        )
+        if len(self.pending) >= BATCH_SIZE:
+            try:
+                with self.db:
+                    self._write_pending()
+            except sqlite3.Error as err:
+                logging.warning("cannot write item cache: %s", err)
+
+    def _write_pending(self):
+        rows, self.pending = self.pending, []
+        self.db.executemany(
+            "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+
+    def close(self):
+        """
+        Drop expired entries and write all changes
+        """
+        if self.db is None:
+            return
+        try:
+            with self.db:
+                self._write_pending()
+                self.db.execute(
+                    "DELETE FROM items WHERE used < ?", (time.time() - self.ttl,)
+                )
+        except sqlite3.Error as err:
+            logging.warning("cannot write item cache: %s", err)
+        self.db.close()
+        self.db = None
+        self.pending = []
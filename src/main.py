@@ -16,97 +16,320 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import functools
 import gettext
+import io
 import logging
+import os
 import sys
 from collections import Counter
-from typing import Tuple
+from typing import Dict, Tuple
 
-import comparetext
 import logger
 import plugins
-from feed import get_feed
-from filter import Filter
+from outputcache import OutputCache
 from settings import Settings
+from utils import Tee, replace_on_success
 
-# setup gettext
-gettext.textdomain("feedfilter")
 
-# parse commandline arguments and settingsfile
-if len(sys.argv) != 2:
-    print("no feed given")
-    sys.exit(-1)
-settings = Settings()
-settings.read_argv()
+def filter_feed(settings, wordfilter, outfile):
+    """
+    Parse the feed, remove duplicates and filtered items, apply the plugins and
+    write the result to outfile
+    """
+    # Imported here, so they are not loaded at all if the cached output is used
+    import analysis
+    import comparetext
+    import dedup
+    from feed import FeedWriter, get_feed
+    from history import History
+    from itemcache import ItemCache
 
-# Start Logger
-logger.setupLogger(settings)
+    feed = get_feed(settings.feedfile, settings.stream)
+    # For now we use the language without any regional variants
+    lang = feed.lang.split("-")[0]
 
-# read and parse filterfiles
-wordfilter = Filter(settings)
-wordfilter.read_filterlist("./blackwordlist.txt")
-wordfilter.read_filterlist(settings.sitename)
+    loaded_plugins = []
+    for plugin in plugins.load_plugins(settings.url):
+        loaded_plugin = plugin(settings.url)
+        loaded_plugin.cachedir = settings.cachedir
+        loaded_plugin.set_time_budget(settings.plugin_time_budget)
+        loaded_plugins.append(loaded_plugin)
+    apply_plugins = functools.partial(plugins.apply_plugins, loaded_plugins)
 
-# Parse feed
-feed = get_feed(settings.feedfile)
-# For now we use the language without any regional variants
-lang = feed.lang.split("-")[0]
+    if settings.stream:
+        writer = FeedWriter(feed, outfile, settings.stream_window, apply_plugins)
 
+    keys = dedup.DuplicateKeys()
+    engine = dedup.get_engine(settings)
+    itemcache = ItemCache(settings, wordfilter.signature)
+    history = History(settings)
 
-loaded_plugins = []
-for plugin in plugins.plugins:
-    loaded_plugins.append(plugin(settings.url))
+    # With filter_first, the filter levels only have to be calculated until
+    # they are sure to exceed the threshold
+    limit = settings.threshold if settings.filter_first else None
 
+    def analyse(child):
+        """
+        Calculate the wordlist of an item, if not done yet
+        """
+        if not hasattr(child, "wordlist"):
+            itemcache.lookup(child)
+        if not hasattr(child, "wordlist"):
+            child.wordlist: Tuple[Dict[str, int], float] = comparetext.analyse(
+                lang, child.title, child.description.text, child.content.text
+            )
 
-for child in feed:
-    if child.deleted:
-        continue
-    # Check for duplicates
-    max_similarity = 0
-    child.wordlist: Tuple[Counter, float] = comparetext.analyse(
-        lang, child.title, str(child.description), str(child.content)
-    )
-    for child2 in feed:
-        if child.id == child2.id or not hasattr(child2, "wordlist"):
-            break
-        similarity = comparetext.comp(child.wordlist, child2.wordlist)
-        max_similarity = max(max_similarity, similarity)
-        if similarity > settings.cmp_threshold:
-            child2.merge_item(child)
+    def score(child):
+        """
+        Calculate the filter level of an item, if not done yet
+        """
+        itemcache.lookup(child)
+        lvl = itemcache.lvl(child)
+        if lvl is None:
+            if not hasattr(child, "filter_lvl"):
+                child.filter_lvl = analysis.score(
+                    wordfilter,
+                    settings.title_scale,
+                    child.title,
+                    child.categories,
+                    child.content.text or child.description.text,
+                    limit,
+                )
+            lvl = child.filter_lvl
+        return lvl
+
+    def apply_filter(child, lvl, max_similarity):
+        """
+        Remove an item, if its filter level exceeds the threshold
+        """
+        child.set_stats(lvl, settings.threshold, max_similarity)
+        if lvl > settings.threshold:
+            logging.warning("removing item %s with score %i", child.title, lvl)
+            removed["filter"] += 1
+            feed.remove_item(child)
+        else:
+            history.add(child)
+        child.append_stats = settings.appendlvl
+        logging.info("%.2g %.2f " % (lvl, max_similarity) + child.title)
+
+        if settings.stream:
+            writer.add(child)
+
+    def remove_duplicate(child, original, tier):
+        """
+        Remove an item as duplicate of an earlier one, given by its Entry
+        """
+        dedup.entry(child).duplicate_of = original
+        removed[tier] += 1
+        feed.remove_item(child)
+
+    def merge(original, child):
+        """
+        Link to a duplicate from the earlier item, if it is not written yet
+        """
+        item = original.item
+        if item is not None:
+            item.merge_item(dedup.entry(child))
+
+    # Number of items removed by each check
+    removed = Counter()
+
+    # Find reposts before analysing anything, so they are never analysed
+    if not settings.stream or engine.batch:
+        unique = [child for child in feed if keys.check(child) is None]
+
+    # Analyse big feeds in several processes, the duplicates are still
+    # searched in order afterwards
+    if not settings.stream and settings.analysis_workers != 1:
+        pending = []
+        for child in unique:
+            itemcache.lookup(child)
+            if not hasattr(child, "wordlist") or itemcache.lvl(child) is None:
+                pending.append(child)
+        if len(pending) > analysis.CHUNK_SIZE:
+            results = analysis.analyse_items(
+                pending,
+                lang,
+                wordfilter,
+                settings.title_scale,
+                settings.analysis_workers,
+                limit,
+            )
+            for child, (wordlist, lvl) in zip(pending, results):
+                if wordlist is not None and not hasattr(child, "wordlist"):
+                    child.wordlist = wordlist
+                child.filter_lvl = lvl
+
+    if engine.batch:
+        if settings.filter_first:
+            unique = [child for child in unique if score(child) <= settings.threshold]
+        for child in unique:
+            analyse(child)
+        engine.prepare(unique)
+
+    for child in feed:
+        if child.deleted:
+            continue
+        # Check for reposts with the same title, link or guid
+        original = keys.check(child)
+        if original is not None:
+            while original.duplicate_of is not None:
+                original = original.duplicate_of
+            merge(original, child)
+            logging.warning(
+                "removing news entry: %s as repost of: %s", child.title, original.title
+            )
+            remove_duplicate(child, original, "repost")
+            continue
+
+        # Check against blackwords first, to not analyse rejected items
+        if settings.filter_first:
+            lvl = score(child)
+            if lvl > settings.threshold:
+                itemcache.store(child, lvl)
+                apply_filter(child, lvl, 0)
+                continue
+
+        # Check for duplicates
+        max_similarity = 0
+        original = None
+        analyse(child)
+        for other, similarity in engine.similar(child):
+            max_similarity = max(max_similarity, similarity)
+            if similarity > settings.cmp_threshold:
+                merge(other, child)
+                logging.warning(
+                    "removing news entry: %s as duplicate of: %s",
+                    child.title,
+                    other.title,
+                )
+                original = original or other
+        engine.add(child)
+        if original is not None:
+            itemcache.store(child)
+            remove_duplicate(child, original, "similar")
+            continue
+
+        # Check for news published in earlier runs or other feeds
+        match = history.match(child)
+        if match is not None:
             logging.warning(
-                "removing news entry: %s as duplicate of: %s",
+                "removing news entry: %s as duplicate of: %s in %s",
                 child.title,
-                child2.title,
+                *match
             )
-    if max_similarity > settings.cmp_threshold:
-        feed.remove_item(child)
-        continue
-
-    # Check against blackwords
-    lvl = wordfilter.check(child.title, settings.title_scale)
-    if child.categories:
-        lvl += wordfilter.check(str(child.categories), 1)
-    if child.content:
-        lvl += wordfilter.check(str(child.content), 1)
-    elif child.description:
-        lvl += wordfilter.check(str(child.description), 1)
-    child.set_stats(lvl, settings.threshold, max_similarity)
-    if lvl > settings.threshold:
-        logging.warning("removing item %s with score %i", child.title, lvl)
-        feed.remove_item(child)
-    child.append_stats = settings.appendlvl
-    logging.info("%.2g %.2f " % (lvl, max_similarity) + child.title)
+            itemcache.store(child)
+            removed["history"] += 1
+            feed.remove_item(child)
+            continue
+
+        # Check against blackwords
+        lvl = score(child)
+        itemcache.store(child, lvl)
+        apply_filter(child, lvl, max_similarity)
+
+    itemcache.close()
+    logging.info(
+        "removed %i reposts, %i duplicates, %i news published before and"
+        " %i filtered news",
+        removed["repost"],
+        removed["similar"],
+        removed["history"],
+        removed["filter"],
+    )
+
+    history.close()
+
+    if settings.stream:
+        writer.flush()
+    else:
+        apply_plugins([child for child in feed if not child.deleted])
 
     for plugin in loaded_plugins:
-        plugin.apply_on_item(child)
+        plugin.apply_on_feed(feed)
+
+    if settings.stream:
+        writer.close()
+    else:
+        outfile.write(feed.tostring())
+
+
+def filterlists(settings):
+    """
+    The filterlists used for a feed, relative to the config-directory
+    """
+    return ["./blackwordlist.txt", settings.sitename]
+
+
+def process(settings, wordfilter=None, outfile=None):
+    """
+    Filter the feed given by the settings and return the output
+
+    wordfilter: the loaded filter for the feed, read from the filterlists if
+    not given
+    outfile: binary file the output is written to, while it is created
+
+    When streaming, the output is only written to outfile and None is returned,
+    so that it is never held in memory. The output cache is not used then.
+    """
+    cache = None
+    if not settings.stream:
+        # Use the output of the last run, if nothing changed since then
+        cache = OutputCache(settings)
+        key = cache.key(
+            settings.feedfile,
+            [os.path.join(settings.confdir, name) for name in filterlists(settings)],
+            plugins.plugin_files(settings.url),
+        )
+        output = cache.get(key)
+        if output is not None:
+            logging.info("feed and filters unchanged, using cached output")
+            if outfile is not None:
+                outfile.write(output)
+            return output
+
+    # read and parse filterfiles
+    if wordfilter is None:
+        from filter import Filter
+
+        wordfilter = Filter(settings)
+        wordfilter.load(*filterlists(settings))
+
+    if cache is None:
+        filter_feed(settings, wordfilter, outfile)
+        return None
+    buffer = io.BytesIO()
+    if outfile is not None:
+        outfile = Tee(buffer, outfile)
+    filter_feed(settings, wordfilter, outfile or buffer)
+    output = buffer.getvalue()
+    cache.put(key, output)
+    return output
+
+
+def main():
+    # setup gettext
+    gettext.textdomain("feedfilter")
+
+    # parse commandline arguments and settingsfile
+    if len(sys.argv) != 2:
+        print("no feed given")
+        sys.exit(-1)
+    settings = Settings()
+    settings.read_argv()
+
+    # Start Logger
+    logger.setupLogger(settings)
 
-for plugin in loaded_plugins:
-    plugin.apply_on_feed(feed)
+    if settings.outputfile is None:
+        # Write output to console
+        process(settings, outfile=sys.stdout.buffer)
+    else:
+        # Write output to file, replacing the old one only if successful
+        with replace_on_success(settings.outputfile) as outfile:
+            process(settings, outfile=outfile)
 
 
-if settings.outputfile is None:
-    # Write output to console
-    feed.print()
-else:
-    # Write output to file
-    feed.write(settings.outputfile)
+if __name__ == "__main__":
+    main()
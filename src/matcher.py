@@ -0,0 +1,101 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+from collections import deque
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton to search many strings in a text at once
+    """
+
+    def __init__(self, patterns):
+        """
+        Build the automaton
+
+        patterns: the strings to search for
+        """
+        # state 0 is the root, every state has a dict of transitions,
+        # a failure link and the patterns ending in it
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(set())
+            state = next_state
+        self.output[state].add(pattern)
+
+    def _link(self):
+        """
+        Calculate the failure links with a breadth first search
+        """
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] |= self.output[self.fail[next_state]]
+        self.output = [frozenset(out) for out in self.output]
+
+    def find(self, text):
+        """
+        Return the set of all patterns occurring in the text
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set(output[0])
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def finditer(self, text):
+        """
+        Yield every pattern occurring in the text once, as soon as it is found
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set(output[0])
+        yield from found
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] and not output[state] <= found:
+                for pattern in output[state] - found:
+                    found.add(pattern)
+                    yield pattern
@@ -0,0 +1,91 @@
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import functools
+import hashlib
+import logging
+import os
+import tempfile
+
+
+class OutputCache:
+    """
+    Remember the output of the last run for every feed
+
+    The output is stored together with a hash over everything it depends on:
+    the feed, the filterlists, the configuration and the plugins. If none of
+    them changed, the stored output can be used without processing the feed.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.directory = os.path.join(settings.cachedir, "output")
+        name = hashlib.sha1(settings.url.encode()).hexdigest()
+        self.filename = os.path.join(self.directory, name)
+
+    def key(self, feed_file, filterlists, plugins):
+        """
+        Calculate the hash of all inputs
+
+        feed_file: the raw feed as seekable binary file, read in chunks
+        filterlists: the paths of all used filterlists
+        plugins: the paths of all used plugin modules
+        """
+        digest = hashlib.sha256()
+        digest.update(self.settings.url.encode())
+        digest.update(str(self.settings.debug_mode).encode())
+        for chunk in iter(functools.partial(feed_file.read, 1 << 16), b""):
+            digest.update(chunk)
+        feed_file.seek(0)
+        files = [os.path.join(self.settings.confdir, "feedfilter.conf")]
+        files += filterlists
+        files += plugins
+        for filename in files:
+            digest.update(b"\0" + filename.encode() + b"\0")
+            try:
+                with open(filename, "rb") as infile:
+                    digest.update(infile.read())
+            except OSError:
+                digest.update(b"missing")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Return the stored output, if it was created from the same inputs
+        """
+        try:
+            with open(self.filename, "rb") as infile:
+                if infile.readline().rstrip(b"\n") == key.encode():
+                    return infile.read()
+        except OSError:
+            pass
+        return None
+
+    def put(self, key, output):
+        """
+        Store the output for the given inputs
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, delete=False
+            ) as outfile:
+                outfile.write(key.encode() + b"\n")
+                outfile.write(output)
+            os.replace(outfile.name, self.filename)
+        except OSError:
+            logging.warning("cannot write output cache: " + self.filename)
@@ -1,35 +1,214 @@
 import importlib
+import logging
 import os
+import time
 from abc import ABC, abstractmethod
 from glob import glob
 
 
 class Plugin(ABC):
+    """
+    Base class of all plugins
+
+    A plugin can implement apply_on_item, which is called for every kept item,
+    or apply_on_items to handle a batch of items at once, or the coroutine
+    apply_on_item_async. The coroutines of all items and all async plugins
+    run concurrently.
+
+    Every plugin has a time budget per feed. When it is used up, the plugin is
+    skipped for all remaining items.
+    """
+
     enabled = False
+    # Directory to store data between runs, set before the plugin is used
+    cachedir = None
+    # Seconds the plugin may run per feed (None for no limit) and used so far
+    time_budget = None
+    time_used = 0
+    # Point in time (time.monotonic) at which the time budget is used up
+    deadline = None
 
     @abstractmethod
     def __init__(self, url):
         pass
 
+    def set_time_budget(self, seconds):
+        """
+        Set the time budget of the plugin, 0 for no limit
+        """
+        self.time_budget = seconds if seconds > 0 else None
+
+    def _start(self):
+        self._started = time.monotonic()
+        if self.time_budget is not None:
+            self.deadline = self._started + self.time_budget - self.time_used
+
+    def _stop(self):
+        self.time_used += time.monotonic() - self._started
+
+    def remaining_time(self):
+        """
+        The remaining time budget in seconds or None if there is no limit
+        """
+        if self.deadline is None:
+            return None
+        return max(0, self.deadline - time.monotonic())
+
+    def expired(self):
+        """
+        Whether the time budget is used up
+        """
+        return self.remaining_time() == 0
+
+    @property
+    def is_async(self):
+        """
+        Whether the plugin implements apply_on_item_async
+        """
+        return type(self).apply_on_item_async is not Plugin.apply_on_item_async
+
     def apply_on_feed(self, feed):
         pass
 
+    def prepare_items(self, items):
+        """
+        Called with a batch of items, before apply_on_item is called on each
+        of them. Can be used to fetch data for all items at once.
+        """
+        pass
+
     def apply_on_item(self, item):
         pass
 
+    def apply_on_items(self, items):
+        """
+        Apply the plugin on a batch of items, until the time budget is used up
+        """
+        self.prepare_items(items)
+        for index, item in enumerate(items):
+            if self.expired():
+                skipped(self, len(items) - index)
+                return
+            self.apply_on_item(item)
+
+    async def apply_on_item_async(self, item):
+        """
+        Coroutine to apply the plugin on an item, used instead of apply_on_item
+        if implemented
+        """
+        raise NotImplementedError
+
+
+# Only imported by apply_plugins once an async plugin runs, since loading it
+# takes a noticeable part of the startup time
+asyncio = None
+
+
+def skipped(plugin, count):
+    logging.warning(
+        "plugin %s exceeded its time budget, skipped %i items",
+        type(plugin).__name__,
+        count,
+    )
+
+
+def apply_plugins(loaded_plugins, items):
+    """
+    Apply all plugins on a batch of items
+
+    The async plugins run concurrently, the others one after another.
+    """
+    global asyncio
+    async_plugins = [plugin for plugin in loaded_plugins if plugin.is_async]
+    if async_plugins and items:
+        import asyncio
+
+        asyncio.run(_apply_async(async_plugins, items))
+    for plugin in loaded_plugins:
+        if not plugin.is_async:
+            plugin._start()
+            plugin.apply_on_items(items)
+            plugin._stop()
+
+
+async def _apply_async(async_plugins, items):
+    await asyncio.gather(
+        *(_apply_plugin_async(plugin, items) for plugin in async_plugins)
+    )
+
+
+async def _apply_plugin_async(plugin, items):
+    plugin._start()
+    tasks = [asyncio.ensure_future(plugin.apply_on_item_async(item)) for item in items]
+    done, pending = await asyncio.wait(tasks, timeout=plugin.remaining_time())
+    plugin._stop()
+    for task in pending:
+        task.cancel()
+    if pending:
+        skipped(plugin, len(pending))
+    for task in done:
+        if task.exception() is not None:
+            logging.warning(
+                "plugin %s failed: %s", type(plugin).__name__, task.exception()
+            )
 
-plugins = []
 
 path = os.path.dirname(os.path.realpath(__file__))
-for plugin_path in glob(path + os.path.sep + "*.py"):
-    if plugin_path == __file__:
-        continue
-    plugin_path = plugin_path.replace(path, "")
-    if plugin_path[0] == os.path.sep:
-        plugin_path = plugin_path[1:]
-    plugin_spec = plugin_path.replace(os.path.sep, ".").replace(".py", "")
-    plugin_spec = "plugins." + plugin_spec
-    plugin = importlib.import_module(plugin_spec)
-    if "PLUGIN_CLASS" not in dir(plugin):
-        raise Exception("Plugin missing constant PLUGIN_CLASS")
-    plugins.append(plugin.PLUGIN_CLASS)
+
+
+def url_patterns(plugin_path):
+    """
+    Read the URL_PATTERNS constant of a plugin module without importing it
+
+    A plugin defining URL_PATTERNS, a list of url substrings, is only imported
+    if the feed matches one of them, so its dependencies are not loaded for
+    other feeds. Returns None for plugins without URL_PATTERNS, they are
+    imported for every feed.
+    """
+    import ast
+
+    with open(plugin_path, encoding="utf-8") as infile:
+        module = ast.parse(infile.read(), plugin_path)
+    for node in module.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "URL_PATTERNS"
+            for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    return None
+
+
+def _plugin_modules(url):
+    """
+    Return the paths of the plugin modules used for the feed at url
+    """
+    files = []
+    for plugin_path in sorted(glob(os.path.join(path, "*.py"))):
+        if os.path.basename(plugin_path) == "__init__.py":
+            continue
+        patterns = url_patterns(plugin_path)
+        if patterns is None or any(pattern in url for pattern in patterns):
+            files.append(plugin_path)
+    return files
+
+
+def plugin_files(url):
+    """
+    Return the paths of the plugin framework and of the plugin modules used for
+    the feed at url
+    """
+    return [os.path.join(path, "__init__.py")] + _plugin_modules(url)
+
+
+def load_plugins(url):
+    """
+    Import the plugins used for the feed at url and return their classes
+    """
+    plugins = []
+    for plugin_path in _plugin_modules(url):
+        plugin_spec = "plugins." + os.path.basename(plugin_path)[:-3]
+        plugin = importlib.import_module(plugin_spec)
+        if "PLUGIN_CLASS" not in dir(plugin):
+            raise Exception("Plugin missing constant PLUGIN_CLASS")
+        plugins.append(plugin.PLUGIN_CLASS)
+    return plugins
@@ -1,10 +1,21 @@
+import glob
+import hashlib
+import json
+import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 
 import requests
 
 from . import Plugin
 
+# The url substrings of the feeds the plugin is used for, read by the plugin
+# loader without importing this module
+URL_PATTERNS = ["tagesschau.de"]
+
 
 @dataclass
 class Link:
@@ -13,22 +24,76 @@ class Link:
 
 
 class Tagesschau(Plugin):
-    filter_url = "tagesschau.de"
     base_url = "https://www.tagesschau.de/"
     api_url = "https://www.tagesschau.de/api/"
+    # number of parallel requests, timeout of each request in seconds and
+    # time in seconds after which cached metadata is fetched again
+    workers = 8
+    timeout = 10
+    cache_ttl = 6 * 3600
 
     def __init__(self, url):
         super().__init__(url)
-        if self.filter_url in url:
+        self.metadata = {}
+        if any(pattern in url for pattern in URL_PATTERNS):
             self.enabled = True
             self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.workers)
+            self.session.mount("https://", adapter)
+
+    def __cache_file(self, url):
+        if self.cachedir is None:
+            return None
+        name = hashlib.sha1(url.encode()).hexdigest() + ".json"
+        return os.path.join(self.cachedir, "tagesschau", name)
 
     def __get_mata_data(self, url):
+        cache_file = self.__cache_file(url)
+        try:
+            if time.time() - os.path.getmtime(cache_file) < self.cache_ttl:
+                with open(cache_file) as infile:
+                    return json.load(infile)
+        except (TypeError, OSError, ValueError):
+            pass
         data_url = url.replace(self.base_url, self.api_url).replace("html", "json")
-        r = self.session.get(data_url)
+        try:
+            r = self.session.get(data_url, timeout=self.timeout)
+        except requests.RequestException as err:
+            raise ValueError("Error on getting url: %s: %s" % (data_url, err))
         if r.status_code != 200:
             raise ValueError("Error %i on getting url: %s" % (r.status_code, data_url))
-        return r.json()
+        metadata = r.json()
+        if cache_file is not None:
+            try:
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=os.path.dirname(cache_file), delete=False
+                ) as outfile:
+                    json.dump(metadata, outfile)
+                os.replace(outfile.name, cache_file)
+            except OSError:
+                pass
+        return metadata
+
+    def __prune_cache(self):
+        """
+        Delete the cached metadata that is too old to be used again
+        """
+        if self.cachedir is None:
+            return
+        pattern = os.path.join(self.cachedir, "tagesschau", "*")
+        for cache_file in glob.glob(pattern):
+            try:
+                if time.time() - os.path.getmtime(cache_file) >= self.cache_ttl:
+                    os.remove(cache_file)
+            except OSError:
+                pass
+
+    def __fetch(self, url):
+        try:
+            return self.__get_mata_data(url)
+        except ValueError as err:
+            return err
 
     @classmethod
     def __extrace_multimedia_links(cls, metadata):
@@ -57,13 +122,33 @@ class Tagesschau(Plugin):
                         av_links.append(av_link)
         return (av_links, av_types)
 
+    def apply_on_feed(self, feed):
+        if self.enabled:
+            self.__prune_cache()
+
+    def prepare_items(self, items):
+        if not self.enabled:
+            return
+        links = dict.fromkeys(item.link for item in items)
+        links = [link for link in links if link not in self.metadata]
+        pool = ThreadPoolExecutor(self.workers)
+        futures = {pool.submit(self.__fetch, link): link for link in links}
+        done, pending = wait(futures, timeout=self.remaining_time())
+        for future in done:
+            self.metadata[futures[future]] = future.result()
+        # don't wait for requests exceeding the time budget
+        pool.shutdown(wait=False, cancel_futures=True)
+
     def apply_on_item(self, item):
         if not self.enabled:
             return
-        try:
-            metadata = self.__get_mata_data(item.link)
-        except ValueError as err:
-            print(err, file=sys.stderr)
+        metadata = self.metadata.pop(item.link, None)
+        if metadata is None:
+            if self.expired():
+                return
+            metadata = self.__fetch(item.link)
+        if isinstance(metadata, ValueError):
+            print(metadata, file=sys.stderr)
             return
         av_links, av_types = self.__extrace_multimedia_links(metadata)
         if len(av_links) > 0:
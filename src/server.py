@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#
+#  feedfilter - remove duplicates and uninteresting stuff in news-feeds
+#  Copyright (C) 2016 Michael F. Schoenitzer
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+import gettext
+import logging
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logger
+from fetch import fetch
+from filter import Filter
+from main import filterlists, process
+from settings import Settings
+
+# Loaded filters, by the filterlists they were read from
+filters = {}
+filters_lock = threading.Lock()
+
+
+def get_filter(settings):
+    """
+    Return the filter for a feed, reading the filterlists only if they changed
+    """
+    names = tuple(filterlists(settings))
+    with filters_lock:
+        wordfilter = filters.get(names)
+        if wordfilter is None or wordfilter.changed():
+            wordfilter = Filter(settings)
+            wordfilter.load(*names)
+            filters[names] = wordfilter
+        return wordfilter
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """
+    Serve filtered feeds at /feed?src=<url, section or file>
+    """
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        if url.path != "/feed" or "src" not in query:
+            self.send_error(404, "Use /feed?src=<url or section>")
+            return
+        settings = Settings()
+        try:
+            settings.read_source(query["src"][0])
+            settings.feedfile = fetch(settings.url, settings.cachedir, settings.timeout)
+            if settings.stream:
+                self._stream(settings)
+                return
+            output = process(settings, get_filter(settings))
+        except ValueError as err:
+            self.send_error(400, str(err))
+            return
+        except Exception as err:
+            logging.exception("error processing feed %s", query["src"][0])
+            self.send_error(502, str(err))
+            return
+        finally:
+            if settings.feedfile is not None:
+                settings.feedfile.close()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(output)))
+        self.end_headers()
+        self.wfile.write(output)
+
+    def _stream(self, settings):
+        """
+        Send the feed while it is filtered, without knowing its length
+
+        Errors can only be reported before the first byte was sent.
+        """
+        wordfilter = get_filter(settings)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            process(settings, wordfilter, self.wfile)
+        except Exception:
+            logging.exception("error streaming feed %s", settings.url)
+
+    def log_message(self, format, *args):
+        logging.info("%s - " + format, self.address_string(), *args)
+
+
+def main():
+    # setup gettext
+    gettext.textdomain("feedfilter")
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    host = sys.argv[2] if len(sys.argv) > 2 else "localhost"
+
+    # Start Logger with the default settings
+    settings = Settings()
+    settings.read_defaults()
+    logger.setupLogger(settings)
+
+    server = ThreadingHTTPServer((host, port), FeedHandler)
+    logging.info("serving feeds at http://%s:%i/feed", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
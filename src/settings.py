@@ -1,18 +1,22 @@
 import configparser
 import os
 import sys
-import urllib.request
 
 import utils
+from fetch import fetch
 
 
 class Settings:
     sitename = None
     confdir = None
+    cachedir = None
     url = None
     sitename = None
     threshold = 1
     cmp_threshold = 0.35
+    cmp_engine = "exact"
+    lsh_bands = 32
+    lsh_rows = 2
     title_scale = 2
     logfile = None
     loglevel_file = "INFO"
@@ -20,19 +24,41 @@ class Settings:
     appendlvl = False
     outputfile = None
     feedfile = None
+    timeout = 30
+    item_cache_ttl = 48
+    history_ttl = 0
+    history_size = 10000
+    plugin_time_budget = 60
+    stream = False
+    stream_window = 100
+    fetch_workers = 8
+    batch_workers = 0
+    analysis_workers = 1
+    filter_first = False
 
     def __init__(self):
         # read env-variables
         self.confdir = os.getenv(
             "FEED_FILTER_CONF", os.path.join(os.getenv("HOME"), ".feedfilter")
         )
+        self.cachedir = os.getenv(
+            "FEED_FILTER_CACHE", os.path.join(self.confdir, "cache")
+        )
         self.debug_mode = utils.toBool(os.getenv("DEBUG", "false"))
         self.configs = configparser.ConfigParser()
         self.configs.read(os.path.join(self.confdir, "feedfilter.conf"))
 
     # parse arguments and read feed from file/url
     def read_argv(self):
-        arg = sys.argv[1]
+        try:
+            self.read_source(sys.argv[1])
+        except ValueError as err:
+            print(err)
+            sys.exit(-1)
+        self.feedfile = fetch(self.url, self.cachedir, self.timeout)
+
+    # determine url and settings of a feed given as url, section or file
+    def read_source(self, arg):
         if arg[0:4] == "http":
             self.url = arg
             self.sitename = self.url.split("/")[2]
@@ -41,18 +67,20 @@ class Settings:
             try:
                 self.url = self.configs[arg]["url"]
             except KeyError:
-                print("Config does not specify an url")
-                sys.exit(-1)
+                raise ValueError("Config does not specify an url")
             self.sitename = arg
             config = self.configs[arg]
         else:
             self.url = "file://" + os.path.abspath(os.path.expanduser(arg))
             self.sitename = os.path.splitext(os.path.basename(arg))[0]
             config = self._search_config(self.url)
-        self.feedfile = urllib.request.urlopen(self.url)
         if config:
             self._load_settings(config)
 
+    # use the settings of the DEFAULT-section
+    def read_defaults(self):
+        self._load_settings(self.configs[self.configs.default_section])
+
     def _search_config(self, term):
         for title, section in self.configs.items():
             if title in term:
@@ -63,12 +91,30 @@ class Settings:
         self.sitename = config.get("sitename", self.sitename)
         self.threshold = config.getfloat("threshold", self.threshold)
         self.cmp_threshold = config.getfloat("cmp_threshold", self.cmp_threshold)
+        self.cmp_engine = config.get("cmp_engine", self.cmp_engine)
+        self.lsh_bands = config.getint("lsh_bands", self.lsh_bands)
+        self.lsh_rows = config.getint("lsh_rows", self.lsh_rows)
         self.title_scale = config.getfloat("title_scale", self.title_scale)
         self.logfile = config.get("logfile", self.logfile)
         self.loglevel_file = config.get("loglevel", self.loglevel_file)
         self.loglevel_stderr = config.get("verboselevel", self.loglevel_stderr)
         self.appendlvl = config.getboolean("appendlvl", self.appendlvl)
         self.outputfile = config.get("outputfile", self.outputfile)
+        self.timeout = config.getfloat("timeout", self.timeout)
+        self.item_cache_ttl = config.getfloat("item_cache_ttl", self.item_cache_ttl)
+        self.history_ttl = config.getfloat("history_ttl", self.history_ttl)
+        self.history_size = config.getint("history_size", self.history_size)
+        self.plugin_time_budget = config.getfloat(
+            "plugin_time_budget", self.plugin_time_budget
+        )
+        self.filter_first = config.getboolean("filter_first", self.filter_first)
+        self.stream = config.getboolean("stream", self.stream)
+        self.stream_window = config.getint("stream_window", self.stream_window)
+        self.fetch_workers = config.getint("fetch_workers", self.fetch_workers)
+        self.batch_workers = config.getint("batch_workers", self.batch_workers)
+        self.analysis_workers = config.getint(
+            "analysis_workers", self.analysis_workers
+        )
         if self.debug_mode:
             self.loglevel_file = "DEBUG"
             self.loglevel_stderr = "DEBUG"
@@ -15,6 +15,9 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import contextlib
+import os
+import tempfile
 
 
 def toBool(obj):
@@ -26,3 +29,40 @@ def toBool(obj):
         return obj.lower() == "true"
     else:
         raise TypeError("Argument has to be Boolean or String")
+
+
+class Tee:
+    """
+    File object writing to several files at once
+    """
+
+    def __init__(self, *files):
+        self.files = files
+
+    def write(self, data):
+        for outfile in self.files:
+            outfile.write(data)
+
+
+@contextlib.contextmanager
+def replace_on_success(filename):
+    """
+    Binary file object, whose content replaces filename at the end of the
+    with-block
+
+    If the block fails, filename is left untouched, so a failed run never
+    destroys the last good output.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    outfile = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+    try:
+        with outfile:
+            yield outfile
+        # temporary files are only readable by the owner
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(outfile.name, 0o666 & ~umask)
+        os.replace(outfile.name, filename)
+    except BaseException:
+        os.remove(outfile.name)
+        raise
@@ -0,0 +1,71 @@
+"""
+Check that scoring with a limit only stops early when the result is certain
+"""
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+)
+
+import analysis  # noqa: E402
+from filter import Filter  # noqa: E402
+
+WORDS = ["spam", "sport", "fussball", "politik", "wetter", "EU", "TV", "neutral"]
+
+
+@pytest.fixture
+def wordfilter(tmp_path):
+    settings = SimpleNamespace(confdir=str(tmp_path), cachedir=str(tmp_path))
+    wordfilter = Filter(settings)
+    wordfilter.blackwords = {
+        "spam": 4,
+        "sport": 2,
+        "fussball": 3,
+        "politik": -2,
+        "wetter": -1.5,
+    }
+    wordfilter.exactblackwords = {"EU": -3, "TV": 1}
+    return wordfilter
+
+
+def items():
+    rng = random.Random(0)
+    for _ in range(500):
+        title, categories, text = (
+            " ".join(rng.choice(WORDS) for _ in range(rng.randrange(4)))
+            for _ in range(3)
+        )
+        yield title, categories, text
+
+
+@pytest.mark.parametrize("title_scale", [1, 2.5])
+def test_score_limit(wordfilter, title_scale):
+    for title, categories, text in items():
+        exact = analysis.score(wordfilter, title_scale, title, categories, text)
+        for limit in (-5, -1, 0, 0.5, 2, 3, 6, 10):
+            lvl = analysis.score(
+                wordfilter, title_scale, title, categories, text, limit
+            )
+            if exact <= limit:
+                assert lvl == pytest.approx(exact)
+            else:
+                # a lower bound, but one that already exceeds the limit
+                assert limit < lvl <= exact + 1e-9
+
+
+def test_check_limit(wordfilter):
+    for title, _, text in items():
+        text = title + " " + text
+        for multiplier in (1, 2):
+            exact = wordfilter.check(text, multiplier)
+            for limit in (-4, 0, 1, 3, 8):
+                lvl = wordfilter.check(text, multiplier, limit)
+                if exact <= limit:
+                    assert lvl == pytest.approx(exact)
+                else:
+                    assert limit < lvl <= exact + 1e-9
@@ -0,0 +1,40 @@
+"""
+Compare the similarity matrix with the pairwise comparison of wordlists
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+)
+
+import comparetext  # noqa: E402
+
+TEXTS = [
+    ("de", "Die Bundesregierung beschließt das neue Klimaschutzgesetz"),
+    ("de", "Klimaschutzgesetz: Bundesregierung beschließt Änderungen am Gesetz"),
+    ("de", "FC Bayern gewinnt das Spiel gegen Dortmund mit 3:1"),
+    ("en", "The government passes the new climate law, the law passes"),
+    ("en", "New climate law passed by the UK government"),
+    ("en", "a b 12 345"),
+    ("", ""),
+]
+
+
+@pytest.mark.skipif(not comparetext.have_numpy(), reason="needs numpy and scipy")
+def test_similarity_matrix():
+    wordlists = [comparetext.analyse(lang, text) for lang, text in TEXTS]
+    # the texts consisting only of ignored words have an empty wordlist
+    assert wordlists[-1] == ({}, 0)
+    assert wordlists[-2] == ({}, 0)
+    matrix = comparetext.similarity_matrix(wordlists).toarray()
+    assert matrix.shape == (len(TEXTS), len(TEXTS))
+    for i, wordlist_1 in enumerate(wordlists):
+        for j, wordlist_2 in enumerate(wordlists):
+            expected = comparetext.comp(wordlist_1, wordlist_2)
+            assert matrix[i, j] == pytest.approx(expected, abs=1e-12)
+    # make sure the texts are similar enough for the comparison to matter
+    assert matrix[0, 1] > 0.1
+    assert matrix[3, 4] > 0.1
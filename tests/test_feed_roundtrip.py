@@ -0,0 +1,223 @@
+"""
+Parse, filter and write RSS and Atom feeds with both XML backends
+
+The backend is chosen when the feed package is imported, so every case runs in
+a new interpreter with FEED_FILTER_XML_BACKEND set.
+"""
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+
+ATOM = "http://www.w3.org/2005/Atom"
+CONTENT = "http://purl.org/rss/1.0/modules/content/"
+
+RSS_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="%s" xmlns:content="%s">
+<channel>
+<title>Example</title>
+<language>en</language>
+<atom:link href="https://example.org/rss" rel="self"/>
+<item><title>First</title><guid>1</guid><description>one</description>\
+<content:encoded>&lt;p&gt;first&lt;/p&gt;</content:encoded></item>
+<item><title>Second</title><guid>2</guid><description>two</description></item>
+<item><title>Third</title><guid>3</guid><description>three</description></item>
+<lastBuildDate>Mon, 01 Jan 2024 00:00:00 GMT</lastBuildDate>
+</channel>
+</rss>
+""" % (
+    ATOM,
+    CONTENT,
+)
+
+# Without a declaration of the content namespace, feedfilter adds it
+PLAIN_RSS_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+<title>Example</title>
+<language>en</language>
+<item><title>First</title><guid>1</guid><description>one</description></item>
+<item><title>Second</title><guid>2</guid><description>two</description></item>
+<item><title>Third</title><guid>3</guid><description>three</description></item>
+</channel>
+</rss>
+"""
+
+ATOM_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="%s" xml:lang="en">
+<title>Example</title>
+<id>urn:example</id>
+<link href="https://example.org/atom" rel="self"/>
+<entry><id>1</id><title>First</title><content>one</content></entry>
+<entry><id>2</id><title>Second</title><content>two</content></entry>
+<entry><id>3</id><title>Third</title><content>three</content></entry>
+<updated>2024-01-01T00:00:00Z</updated>
+</feed>
+""" % ATOM
+
+# Reads the feeds given as arguments, removes the item with id 2 and writes
+# them to stdout, separated by a null byte
+SCRIPT = """
+import io
+import sys
+
+from feed import FeedWriter, get_feed
+
+stream = sys.argv[1] == "stream"
+for filename in sys.argv[2:]:
+    with open(filename, "rb") as infile:
+        feed = get_feed(infile, stream)
+        outfile = io.BytesIO()
+        writer = FeedWriter(feed, outfile) if stream else None
+        for child in feed:
+            if child.id == "2":
+                feed.remove_item(child)
+            elif writer is not None:
+                writer.add(child)
+        if writer is not None:
+            writer.close()
+        else:
+            feed.write(outfile)
+    sys.stdout.buffer.write(outfile.getvalue() + b"\\0")
+"""
+
+
+def output(tmp_path, backend, stream, *feeds):
+    """
+    Filter the feeds in a new interpreter and return the written documents
+    """
+    filenames = []
+    for index, feed in enumerate(feeds):
+        filename = tmp_path / ("feed%i.xml" % index)
+        filename.write_text(feed, encoding="UTF-8")
+        filenames.append(str(filename))
+    env = dict(os.environ, FEED_FILTER_XML_BACKEND=backend)
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, "stream" if stream else "tree"] + filenames,
+        cwd=SRC,
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    return result.stdout.split(b"\0")[:-1]
+
+
+def run(tmp_path, backend, stream, *feeds):
+    """
+    Filter the feeds in a new interpreter and return the parsed results
+    """
+    documents = output(tmp_path, backend, stream, *feeds)
+    return [ElementTree.fromstring(data) for data in documents]
+
+
+def tags(element):
+    return [child.tag for child in element if isinstance(child.tag, str)]
+
+
+backends = ["etree"]
+try:
+    import lxml  # noqa: F401
+
+    backends.append("lxml")
+except ImportError:
+    pass
+
+
+@pytest.fixture(params=backends)
+def backend(request):
+    return request.param
+
+
+@pytest.fixture(params=[False, True], ids=["tree", "stream"])
+def stream(request):
+    return request.param
+
+
+def test_rss(tmp_path, backend, stream):
+    (root,) = run(tmp_path, backend, stream, RSS_FEED)
+    assert root.tag == "rss"
+    channel = root.find("channel")
+    assert tags(channel) == [
+        "title",
+        "language",
+        "{%s}link" % ATOM,
+        "item",
+        "item",
+        "lastBuildDate",
+    ]
+    assert [item.findtext("guid") for item in channel.iter("item")] == ["1", "3"]
+    assert channel.find("item").findtext("{%s}encoded" % CONTENT) == "<p>first</p>"
+
+
+def test_atom(tmp_path, backend, stream):
+    (root,) = run(tmp_path, backend, stream, ATOM_FEED)
+    assert root.tag == "{%s}feed" % ATOM
+    assert tags(root) == [
+        "{%s}%s" % (ATOM, tag)
+        for tag in ("title", "id", "link", "entry", "entry", "updated")
+    ]
+    entries = root.iter("{%s}entry" % ATOM)
+    assert [entry.findtext("{%s}id" % ATOM) for entry in entries] == ["1", "3"]
+    assert root.find("{%s}link" % ATOM).get("href") == "https://example.org/atom"
+
+
+def test_rss_after_atom(tmp_path, backend, stream):
+    """
+    Writing an Atom feed must not change how later feeds are written
+    """
+    atom, rss = run(tmp_path, backend, stream, ATOM_FEED, RSS_FEED)
+    assert atom.tag == "{%s}feed" % ATOM
+    assert rss.tag == "rss"
+    assert rss.find("channel/{%s}link" % ATOM) is not None
+
+
+def test_external_entities(tmp_path, backend, stream):
+    """
+    Entities must not be used to include local files into the feed
+    """
+    secret = tmp_path / "secret.txt"
+    secret.write_text("confidential")
+    feed = RSS_FEED.replace(
+        "<rss", '<!DOCTYPE rss [<!ENTITY x SYSTEM "%s">]>\n<rss' % secret.as_uri()
+    ).replace("<title>Example</title>", "<title>Example&x;</title>")
+    try:
+        (data,) = output(tmp_path, backend, stream, feed)
+    except subprocess.CalledProcessError:
+        # refusing the feed is fine as well
+        return
+    assert b"confidential" not in data
+
+
+def test_rss_without_content_namespace(tmp_path, backend, stream):
+    (data,) = output(tmp_path, backend, stream, PLAIN_RSS_FEED)
+    channel = ElementTree.fromstring(data).find("channel")
+    assert [item.findtext("guid") for item in channel.iter("item")] == ["1", "3"]
+    assert len(channel.findall("item/{%s}encoded" % CONTENT)) == 2
+    if not stream:
+        # declared once, not on every item
+        assert data.count(CONTENT.encode()) == 1
+
+
+def test_print(tmp_path, backend):
+    filename = tmp_path / "feed.xml"
+    filename.write_text(ATOM_FEED, encoding="UTF-8")
+    env = dict(os.environ, FEED_FILTER_XML_BACKEND=backend)
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from feed import get_feed;"
+            " get_feed(open(sys.argv[1], 'rb')).print()",
+            str(filename),
+        ],
+        cwd=SRC,
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    root = ElementTree.fromstring(result.stdout)
+    assert len(root.findall("{%s}entry" % ATOM)) == 3
@@ -0,0 +1,87 @@
+"""
+Compare the filter with the simple search for every filterstring it replaced
+"""
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "src")
+)
+
+from filter import Filter  # noqa: E402
+from matcher import Automaton  # noqa: E402
+
+PATTERNS = ["", "a", "ab", "aba", "abab", "bab", "b", "ba", "ca", "abc", "cab", "bb"]
+
+
+def check_old(blackwords, exactblackwords, text, multiplier=1):
+    """
+    The level as calculated before the filterstrings were searched at once
+    """
+    ltext = text.lower()
+    lvl = 0
+    for word in blackwords:
+        if ltext.find(word) != -1:
+            lvl += multiplier * blackwords[word]
+    for word in exactblackwords:
+        if text.find(word) != -1:
+            lvl += multiplier * exactblackwords[word]
+    return lvl
+
+
+def texts():
+    rng = random.Random(0)
+    yield ""
+    yield "abababab"
+    yield "cabbabc"
+    for _ in range(300):
+        yield "".join(rng.choice("abcAB ") for _ in range(rng.randrange(12)))
+
+
+@pytest.mark.parametrize("patterns", [PATTERNS, PATTERNS[1:], ["abab"], []])
+def test_automaton(patterns):
+    automaton = Automaton(patterns)
+    for text in texts():
+        expected = {pattern for pattern in patterns if pattern in text}
+        assert automaton.find(text) == expected
+        found = list(automaton.finditer(text))
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+
+
+@pytest.fixture
+def wordfilter(tmp_path):
+    settings = SimpleNamespace(confdir=str(tmp_path), cachedir=str(tmp_path))
+    wordfilter = Filter(settings)
+    # lowercase strings are searched case insensitive, the others exactly
+    weights = [3, -2, 5, 1.5, -1, 7, 2, -4, 0.5, 10, -3, 1]
+    wordfilter.blackwords = dict(zip(PATTERNS, weights))
+    wordfilter.exactblackwords = {"": 1, "A": 2, "AB": -1, "BAB": 4, "bA": 3}
+    return wordfilter
+
+
+def test_check(wordfilter):
+    for text in texts():
+        for multiplier in (1, 2.5):
+            expected = check_old(
+                wordfilter.blackwords, wordfilter.exactblackwords, text, multiplier
+            )
+            assert wordfilter.check(text, multiplier) == pytest.approx(expected)
+
+
+def test_read_filterlist(tmp_path, wordfilter):
+    (tmp_path / "blackwords").write_text(
+        "# comment\nNews\t2\nbreaking  5\nEU\t1\nabc\t-1\n\n"
+    )
+    wordfilter.blackwords = {}
+    wordfilter.exactblackwords = {}
+    wordfilter.load("blackwords")
+    assert wordfilter.blackwords == {"news": 2, "breaking": 5}
+    assert wordfilter.exactblackwords == {"EU": 1, "abc": -1}
+    for text in ("BREAKING NEWS news", "eu abc", "EU ABC News", ""):
+        expected = check_old(wordfilter.blackwords, wordfilter.exactblackwords, text)
+        assert wordfilter.check(text) == expected